@@ -0,0 +1,103 @@
+"""
+Gunicorn settings for serving the API in production.
+
+    gunicorn --config gunicorn.conf.py
+
+Workers are threaded (gthread): most requests wait on MongoDB, GitHub, SMTP
+or OpenAI, which threads overlap cheaply, and the streaming transcription
+WebSocket holds a thread for as long as it is open. The worker count follows
+the CPUs available to the container rather than the host.
+
+Every setting can be overridden with the environment variables below or on
+the gunicorn command line.
+"""
+import glob
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from utils.route_classes import FAST_REQUEST_TIMEOUT, LONG_REQUEST_TIMEOUT
+
+# Each worker writes its metrics to files in this directory and /metrics
+# aggregates them, whichever worker serves it. It has to be set before the
+# app (and prometheus_client) is imported.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'pangea-metrics'))
+
+
+def available_cpus():
+    # The CPUs this process may run on, which respects container CPU sets
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = 'app:app'
+pythonpath = 'src'
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY') or min(available_cpus() * 2 + 1, int(os.getenv('GUNICORN_MAX_WORKERS', '8'))))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Import the app once in the master so forked workers share its memory and
+# start without importing it again. Code changes then need a restart (or a
+# USR2 upgrade), not a HUP.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Seconds an idle client connection is kept open. Behind a load balancer,
+# set this higher than the balancer's idle timeout.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# A worker that stops responding for this long is killed and replaced. With
+# threaded workers a slow request does not stall the worker, so this only
+# needs to cover fast requests.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', str(int(FAST_REQUEST_TIMEOUT) * 2)))
+
+# On HUP, TERM or a worker restart, in-flight requests get this long to
+# finish, which covers transcription and feedback requests
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', str(int(LONG_REQUEST_TIMEOUT))))
+
+# Restart workers now and then to return memory from audio decoding
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+forwarded_allow_ips = os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1')
+accesslog = '-'
+access_log_format = '%(h)s "%(r)s" %(s)s %(b)s %(D)sus'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Start from empty histograms rather than a previous run's
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def pre_fork(server, worker):
+    # A MongoClient is not fork-safe (it runs monitor threads and holds
+    # sockets), so the one the preloaded app created must not reach a worker
+    if preload_app:
+        from services.mongo_service import mongo_service
+        mongo_service.close()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import app
+        from services.mongo_service import mongo_service
+        with app.app_context():
+            mongo_service.initialize()
+    server.log.info(f"Worker {worker.pid} started ({threads} threads)")
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -67,6 +67,8 @@
 #         app.run(host='0.0.0.0', port=5001, debug=True)
 
 import sys
+import os
+import logging
 from pathlib import Path
 from flask import Flask
 from flask_cors import CORS
@@ -89,57 +91,12 @@ from controllers.feedback_controller import feedback_blueprint
 from controllers.auth_controller import auth_bp
 from config import Config
 from services.mongo_service import mongo_service
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# Load config
-from src.config import Config
-app.config.from_object(Config)
-
-# Cross-origin cookie/session settings
-app.config.update(
-    SESSION_COOKIE_NAME="session",
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE="Lax",     # 👈 change from 'None' to 'Lax'
-    SESSION_COOKIE_SECURE=False        # 👈 okay for local (no HTTPS)
-)
-
-# Set secret key and Mongo URI
-app.secret_key = app.config["SECRET_KEY"]
-app.config["MONGO_URI"] = "mongodb://localhost:27017/pangea"
-
-# Enable CORS for cross-origin access with cookies
-CORS(app,
-     resources={r"/*": {"origins": "*"}},
-     supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
-
-# Import all blueprints
-from src.controllers.auth_controller import auth_bp
-from src.controllers.contact_controller import contact_blueprint
-from src.controllers.problem_controller import problem_blueprint
-from src.controllers.transcription_controller import transcription_blueprint
-from src.controllers.git_controller import git_blueprint
-from src.controllers.problem_instance_controller import problem_instance_blueprint
-from src.controllers.subtask_instance_controller import subtask_instance_blueprint
-from src.controllers.discussion_controller import discussion_blueprint
-
-# Register all blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(contact_blueprint, url_prefix='/api')
-app.register_blueprint(problem_blueprint, url_prefix='/api')
-app.register_blueprint(transcription_blueprint, url_prefix='/api')
-app.register_blueprint(git_blueprint, url_prefix='/api')
-app.register_blueprint(problem_instance_blueprint, url_prefix='/api')
-app.register_blueprint(subtask_instance_blueprint, url_prefix='/api')
-app.register_blueprint(discussion_blueprint, url_prefix='/api')
-app.register_blueprint(feedback_blueprint, url_prefix='/api')
-
-# Initialize MongoDB service
-from src.services.mongo_service import mongo_service
-import logging
+from utils import fast_json, metrics
+from utils.fast_json import jsonify
+from utils.compression import Compression
+from utils.lazy_service import ServiceUnavailableError
+from utils.route_classes import SlowRequestLogger
+from utils.upload_limits import UploadRequest
 
 # Configure logging
 logging.basicConfig(
@@ -148,24 +105,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def initialize_services():
+def create_app(config_object=Config, startup_checks=None):
+    """
+    Build the Flask app.
+
+    Controllers construct their services on first use (see utils.lazy_service),
+    so building the app does not connect to anything, and a service with
+    missing configuration (e.g. SMTP) only fails its own routes, with a 503.
+
+    Args:
+        config_object: Configuration to load
+        startup_checks: Verify MongoDB (collections, a test write and a ping)
+            before returning; defaults to the STARTUP_CHECKS environment variable
+    """
+    app = Flask(__name__)
+
+    # Validate uploads while they stream in (see utils.upload_limits)
+    app.request_class = UploadRequest
+
+    # Log requests that overrun their route class's time budget
+    app.wsgi_app = SlowRequestLogger(app.wsgi_app)
+
+    # Request and dependency latency histograms at /metrics. Registered before
+    # compression so the request timings include it (after_request hooks run
+    # in reverse order), and before any MongoClient is created.
+    metrics.init_app(app)
+
+    # gzip/brotli for JSON and text responses (see utils.compression)
+    Compression(app)
+
+    # Load config
+    app.config.from_object(config_object)
+
+    # JSON responses go through utils.fast_json (orjson); make flask.json agree with it
+    fast_json.init_app(app)
+
+    # Cross-origin cookie/session settings
+    app.config.update(
+        SESSION_COOKIE_NAME="session",
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE="Lax",     # 👈 change from 'None' to 'Lax'
+        SESSION_COOKIE_SECURE=False        # 👈 okay for local (no HTTPS)
+    )
+
+    # Set secret key and Mongo URI
+    app.secret_key = app.config["SECRET_KEY"]
+    app.config["MONGO_URI"] = "mongodb://localhost:27017/pangea"
+
+    # Enable CORS for cross-origin access with cookies
+    CORS(app,
+         resources={r"/*": {"origins": "*"}},
+         supports_credentials=True,
+         allow_headers=["Content-Type", "Authorization"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+
+    # Register all blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(contact_blueprint, url_prefix='/api')
+    app.register_blueprint(problem_blueprint, url_prefix='/api')
+    app.register_blueprint(transcription_blueprint, url_prefix='/api')
+    app.register_blueprint(git_blueprint, url_prefix='/api')
+    app.register_blueprint(problem_instance_blueprint, url_prefix='/api')
+    app.register_blueprint(subtask_instance_blueprint, url_prefix='/api')
+    app.register_blueprint(discussion_blueprint, url_prefix='/api')
+    app.register_blueprint(feedback_blueprint, url_prefix='/api')
+
+    @app.errorhandler(ServiceUnavailableError)
+    def service_unavailable(e):
+        return jsonify({'error': str(e)}), 503
+
+    if startup_checks is None:
+        startup_checks = os.getenv('STARTUP_CHECKS', 'False').lower() == 'true'
+    initialize_services(app, startup_checks)
+
+    return app
+
+def initialize_services(app, run_checks=False):
     with app.app_context():
         try:
             logger.info("Initializing MongoDB service...")
-            mongo_service.initialize()
-            # Ensure collections exist
-            try:
-                mongo_service.ensure_collections()
-                logger.info("MongoDB collections verified successfully")
-            except Exception as collection_error:
-                logger.error(f"Error ensuring collections: {str(collection_error)}")
+            # Only creates the client unless run_checks is set; see MongoService.initialize
+            mongo_service.initialize(run_checks=run_checks)
             logger.info("MongoDB service initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing services: {str(e)}")
             logger.error("Application will continue, but some features may not work correctly")
 
-# Initialize services
-initialize_services()
+app = create_app()
 
 # Function to check if port is in use
 def is_port_in_use(port, host='127.0.0.1'):
@@ -186,8 +212,16 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Run the Pangea Backend API')
     parser.add_argument('--port', type=int, default=5000, help='Port to run the server on (default: 5000)')
     parser.add_argument('--force', action='store_true', help='Force the application to use the specified port')
+    parser.add_argument('--profile-imports', action='store_true',
+                        help='Print how long importing the app takes per module and package, then exit')
+    parser.add_argument('--profile-top', type=int, default=25, help='Rows per section of the import profile (default: 25)')
     args = parser.parse_args()
 
+    if args.profile_imports:
+        from utils.import_profile import import_report
+        print(import_report('app', top=args.profile_top))
+        sys.exit(0)
+
     port = args.port
 
     # Check if specified port is already in use
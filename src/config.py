@@ -9,5 +9,6 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
     SECRET_KEY = os.getenv("SECRET_KEY")
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 16 * 1024 * 1024))  # Upload routes set tighter limits
     SESSION_COOKIE_SAMESITE = "None"
     SESSION_COOKIE_SECURE = False  # True in production
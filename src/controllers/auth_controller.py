@@ -1,4 +1,5 @@
-from flask import Blueprint, redirect, request, session, jsonify, current_app
+from flask import Blueprint, redirect, request, session, current_app
+from utils.fast_json import jsonify
 from utils.github_oauth import get_access_token, get_user_info
 from services.mongo_service import mongo_service
 from models.user_activity_model import create_user_activity
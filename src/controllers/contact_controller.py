@@ -1,9 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from models.contact import Contact
 from services.email_service import EmailService
+from utils.admin_auth import require_admin_token
+from utils.lazy_service import LazyService, ServiceUnavailableError
 
 contact_blueprint = Blueprint('contact', __name__)
-email_service = EmailService()
+email_service = LazyService(EmailService)
 
 @contact_blueprint.route('/contact', methods=['POST'])
 def handle_contact():
@@ -24,11 +27,48 @@ def handle_contact():
             message=data['message']
         )
 
-        # Send email
+        # Queue the emails; they are sent in the background
         if email_service.send_email_support(contact):
-            return jsonify({'message': 'Email sent successfully'}), 200
+            return jsonify({'message': 'Email queued for delivery'}), 202
         else:
-            return jsonify({'error': 'Failed to send email'}), 500
+            return jsonify({'error': 'Email queue is full, please try again later'}), 503
 
+    except ServiceUnavailableError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@contact_blueprint.route('/contact/email-stats', methods=['GET'])
+def get_email_stats():
+    return jsonify(email_service.get_queue_stats()), 200
+
+@contact_blueprint.route('/contact/email-sessions', methods=['GET'])
+@require_admin_token
+def get_email_sessions():
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    sessions = email_service.get_sessions(
+        status=request.args.get('status'),
+        session_type=request.args.get('type'),
+        to_email=request.args.get('toEmail'),
+        since=request.args.get('since'),
+        until=request.args.get('until'),
+        limit=max(1, min(limit, 1000))
+    )
+    return jsonify({'sessions': sessions, 'count': len(sessions)}), 200
+
+@contact_blueprint.route('/contact/sink-messages', methods=['GET'])
+@require_admin_token
+def get_sink_messages():
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    messages = email_service.get_sink_messages(max(1, limit))
+    if messages is None:
+        return jsonify({'error': 'SMTP sink mode is not enabled'}), 404
+    return jsonify({'messages': messages, 'count': len(messages), 'stats': email_service.sink.stats}), 200
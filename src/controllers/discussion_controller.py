@@ -1,10 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from services.discussion_service import DiscussionService
 from models.discussion import Discussion
+from utils.lazy_service import LazyService, ServiceUnavailableError
 from datetime import datetime
 
 discussion_blueprint = Blueprint('discussion', __name__)
-discussion_service = DiscussionService()
+discussion_service = LazyService(DiscussionService)
 
 @discussion_blueprint.route('/discussions', methods=['POST'])
 def create_discussion():
@@ -52,6 +54,8 @@ def create_discussion():
             
         return jsonify(created_discussion.to_dict()), 201
         
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -69,6 +73,8 @@ def get_discussions(problem_id):
     try:
         discussions = discussion_service.get_discussions_by_problem_id(problem_id)
         return jsonify(discussions), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -87,5 +93,7 @@ def vote_discussion(discussion_id):
         if discussion_service.add_vote(discussion_id):
             return jsonify({'success': True}), 200
         return jsonify({'error': 'Discussion not found'}), 404
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
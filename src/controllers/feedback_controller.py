@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from services.feedback_service import FeedbackService
+from utils.lazy_service import LazyService, ServiceUnavailableError
 import json
 
 feedback_blueprint = Blueprint('feedback', __name__)
-feedback_service = FeedbackService()
+feedback_service = LazyService(FeedbackService)
 
 @feedback_blueprint.route('/v1/feedback/transcribe', methods=['POST'])
 def evaluate_transcription():
@@ -31,6 +33,8 @@ def evaluate_transcription():
                 "overallFeedback": "Evaluation failed. Please try again."
                 })
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         print(f"Error in evaluate_answer: {e}")
         return jsonify({"error": "Internal server error"}), 500
@@ -51,6 +55,8 @@ def generate_pr_feedback():
         cleaned_feedback = feedback_service.clean_json_response(feedback_text)
         return jsonify(cleaned_feedback)
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         print(f"Error in evaluate_answer: {e}")
         return jsonify({"error": "Internal server error"}), 500
@@ -1,8 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, stream_with_context
+from utils.fast_json import jsonify
 from services.git_service import GitService
+from services.pr_diff_service import PRDiffService, filter_diff, iter_lines, rechunk
+from services.github_webhook_service import GitHubWebhookService
+from models.pr_diff import PRDiff
+from utils.admin_auth import require_admin_token
+from utils.lazy_service import LazyService, ServiceUnavailableError
 
 git_blueprint = Blueprint('git', __name__)
-git_service = GitService()
+git_service = LazyService(GitService)
+pr_diff_service = LazyService(lambda: PRDiffService(git_service), 'PRDiffService')
+webhook_service = LazyService(lambda: GitHubWebhookService(git_service, pr_diff_service), 'GitHubWebhookService')
+
+def rate_limited_response(response):
+    """429 response for a request the GitHub rate limiter could not schedule"""
+    result = jsonify({'error': response.get('error'), 'rateLimited': True})
+    retry_after = response.get('retryAfter')
+    if retry_after:
+        result.headers['Retry-After'] = str(int(retry_after) + 1)
+    return result, 429
 
 @git_blueprint.route('/git/create-branch', methods=['POST'])
 def create_branch():
@@ -39,9 +55,10 @@ def create_branch():
         # Create the branch name in the format username-main or use provided branchTo
         new_branch_name = data.get('branchTo', f"{username}-{branch_off}")
 
-        # Check if branch already exists
-        if git_service.check_branch_exists(repo_full_name, new_branch_name):
-            # Branch already exists, return success with a message
+        # Create the branch; an existing branch is reported by GitHub on the same call
+        success, response = git_service.create_branch(repo_full_name, new_branch_name, branch_off)
+
+        if success and response.get('alreadyExists'):
             return jsonify({
                 'message': f"Branch '{new_branch_name}' already exists",
                 'branchName': new_branch_name,
@@ -50,11 +67,7 @@ def create_branch():
                     f"git clone -b {new_branch_name} --single-branch https://github.com/{repo_full_name}"
                 ]
             }), 200
-
-        # Create the branch
-        success, response = git_service.create_branch(repo_full_name, new_branch_name, branch_off)
-
-        if success:
+        elif success:
             return jsonify({
                 'message': f"Branch '{new_branch_name}' created successfully",
                 'branchName': new_branch_name,
@@ -63,9 +76,86 @@ def create_branch():
                     f"git clone -b {new_branch_name} --single-branch https://github.com/{repo_full_name}"
                 ]
             }), 201
+        elif response.get('rateLimited'):
+            return rate_limited_response(response)
         else:
             return jsonify({'error': response.get('error', 'Failed to create branch')}), 400
 
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/create-branches', methods=['POST'])
+def create_branches():
+    """
+    Create branches for many users in a GitHub repository at once
+
+    Request body should contain:
+    - repoUrl: The GitHub repository URL
+    - usernames: List of GitHub usernames to create branches for
+    - branchOff: (Optional) The branch to base the new branches on (default: main)
+
+    Each user gets a branch named {username}-{branchOff}.
+
+    Returns:
+        JSON response with the result for every user or error
+    """
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        required_fields = ['repoUrl', 'usernames']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        usernames = data['usernames']
+        if not isinstance(usernames, list) or not usernames or not all(isinstance(u, str) and u for u in usernames):
+            return jsonify({'error': 'usernames must be a non-empty list of strings'}), 400
+
+        branch_off = data.get('branchOff', 'main')
+
+        # Get the full repo name (username/repo)
+        repo_full_name = git_service.get_full_repo_name(data['repoUrl'])
+        if not repo_full_name:
+            return jsonify({'error': 'Invalid GitHub repository URL'}), 400
+
+        branch_names = {username: f"{username}-{branch_off}" for username in usernames}
+        success, response = git_service.create_branches(repo_full_name, list(branch_names.values()), branch_off)
+
+        if not success:
+            if response.get('rateLimited'):
+                return rate_limited_response(response)
+            return jsonify({'error': response.get('error', 'Failed to create branches')}), 400
+
+        branches = []
+        for username, branch_name in branch_names.items():
+            branch_success, branch_response = response['results'][branch_name]
+            if branch_success:
+                status = 'exists' if branch_response.get('alreadyExists') else 'created'
+            else:
+                status = 'rateLimited' if branch_response.get('rateLimited') else 'failed'
+
+            branches.append({
+                'username': username,
+                'branchName': branch_name,
+                'status': status,
+                'error': None if branch_success else branch_response.get('error'),
+                'gitCommands': [
+                    f"git clone -b {branch_name} --single-branch https://github.com/{repo_full_name}"
+                ] if branch_success else []
+            })
+
+        return jsonify({
+            'branches': branches,
+            'created': sum(1 for branch in branches if branch['status'] == 'created'),
+            'alreadyExisted': sum(1 for branch in branches if branch['status'] == 'exists'),
+            'failed': sum(1 for branch in branches if branch['status'] in ('failed', 'rateLimited'))
+        }), 200
+
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -80,6 +170,9 @@ def create_pull_request():
     - base: The name of the branch you want the changes pulled into
     - title: The title of the pull request
 
+    The PR diff is not part of the response; it is fetched in the
+    background and served by GET /git/pr-diff.
+
     Returns:
         JSON response with PR details or error
     """
@@ -106,6 +199,8 @@ def create_pull_request():
         success, response = git_service.create_pull_request(repo_full_name, head, base, title)
 
         if not success:
+            if response.get('rateLimited'):
+                return rate_limited_response(response)
             return jsonify({'error': response.get('error', 'Failed to create pull request')}), 400
 
         # Get the PR number from the response
@@ -113,22 +208,331 @@ def create_pull_request():
         if not pr_number:
             return jsonify({'error': 'Failed to get pull request number'}), 500
 
-        # Get the PR diff
-        diff_success, diff_content = git_service.get_pull_request_diff(repo_full_name, pr_number)
-
-        if not diff_success:
-            return jsonify({
-                'pr_title': title,
-                'pr_number': pr_number,
-                'error': f'Pull request created but failed to get diff: {diff_content}'
-            }), 201
+        # The diff is fetched in the background and served by /git/pr-diff
+        head_sha = (response.get('head') or {}).get('sha')
+        pr_diff, error = pr_diff_service.schedule_fetch(repo_full_name, pr_number, head_sha)
 
         # Return the PR details
         return jsonify({
             'pr_title': title,
             'pr_number': pr_number,
-            'pr_diff': diff_content
+            'diffStatus': pr_diff.status if pr_diff else PRDiff.FAILED,
+            'diffError': error
         }), 201
 
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def load_pr_diff(repo_full_name, pr_number):
+    """
+    Look up the stored diff for the current request's query parameters,
+    scheduling a fetch when it is missing or a refresh is requested
+
+    Returns:
+        Tuple of (ready PRDiff, None) or (None, error response)
+    """
+    head_sha = request.args.get('headSha')
+    pr_diff = pr_diff_service.get_diff(repo_full_name, pr_number, head_sha)
+
+    # Diffs of PRs created elsewhere, new head commits and failed fetches are fetched on request
+    refresh = request.args.get('refresh', '').lower() == 'true'
+    if pr_diff is None or refresh:
+        pr_diff, error = pr_diff_service.schedule_fetch(repo_full_name, pr_number, head_sha)
+        if error:
+            return None, (jsonify({'error': error}), 500)
+
+    if pr_diff.status == PRDiff.PENDING:
+        return None, (jsonify(pr_diff.to_dict()), 202)
+
+    if pr_diff.status == PRDiff.FAILED:
+        return None, (jsonify(pr_diff.to_dict()), 502)
+
+    return pr_diff, None
+
+@git_blueprint.route('/git/pr-diff', methods=['GET'])
+def get_pull_request_diff():
+    """
+    Get the stored diff of a pull request, one page of files at a time
+
+    Query parameters:
+    - repoUrl: The GitHub repository URL
+    - prNumber: The pull request number
+    - page: (Optional) 1-based page of files (default: 1)
+    - perPage: (Optional) Files per page, at most 100 (default: 20)
+    - path: (Optional) Only return the diff of this file
+    - headSha: (Optional) Head commit to get the diff of (default: latest requested)
+    - refresh: (Optional) 'true' to check GitHub for a new head commit (or retry a failed fetch)
+
+    Returns:
+        202 while the diff is being fetched, otherwise JSON response with the
+        diff summary and the requested files
+    """
+    try:
+        repo_url = request.args.get('repoUrl')
+        if not repo_url:
+            return jsonify({'error': 'Missing required parameter: repoUrl'}), 400
+
+        try:
+            pr_number = int(request.args.get('prNumber', ''))
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('perPage', 20))
+        except ValueError:
+            return jsonify({'error': 'prNumber, page and perPage must be integers'}), 400
+
+        if page < 1 or not 1 <= per_page <= 100:
+            return jsonify({'error': 'page must be at least 1 and perPage between 1 and 100'}), 400
+
+        repo_full_name = git_service.get_full_repo_name(repo_url)
+        if not repo_full_name:
+            return jsonify({'error': 'Invalid GitHub repository URL'}), 400
+
+        pr_diff, error_response = load_pr_diff(repo_full_name, pr_number)
+        if error_response:
+            return error_response
+
+        path = request.args.get('path')
+        file_count = 1 if path is not None else len(pr_diff.files)
+        result = pr_diff.to_dict()
+        result.update({
+            'page': page,
+            'perPage': per_page,
+            'totalPages': (file_count + per_page - 1) // per_page,
+            'diffs': pr_diff_service.get_diff_files(pr_diff, page, per_page, path)
+        })
+        return jsonify(result), 200
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/pr-diff/raw', methods=['GET'])
+def get_raw_pull_request_diff():
+    """
+    Stream the stored diff of a pull request as plain text
+
+    Query parameters:
+    - repoUrl: The GitHub repository URL
+    - prNumber: The pull request number
+    - path: (Optional) Only return the diff of this file
+    - headSha: (Optional) Head commit to get the diff of (default: latest requested)
+    - refresh: (Optional) 'true' to check GitHub for a new head commit (or retry a failed fetch)
+
+    Returns:
+        The unified diff (text/x-diff), or JSON with status 202 while the
+        diff is being fetched
+    """
+    try:
+        repo_url = request.args.get('repoUrl')
+        if not repo_url:
+            return jsonify({'error': 'Missing required parameter: repoUrl'}), 400
+
+        try:
+            pr_number = int(request.args.get('prNumber', ''))
+        except ValueError:
+            return jsonify({'error': 'prNumber must be an integer'}), 400
+
+        repo_full_name = git_service.get_full_repo_name(repo_url)
+        if not repo_full_name:
+            return jsonify({'error': 'Invalid GitHub repository URL'}), 400
+
+        pr_diff, error_response = load_pr_diff(repo_full_name, pr_number)
+        if error_response:
+            return error_response
+
+        chunks = pr_diff_service.iter_diff(pr_diff, request.args.get('path'))
+        response = Response(stream_with_context(chunks), mimetype='text/x-diff')
+        response.headers['ETag'] = f'"{pr_diff.head_sha}"'
+        return response
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/pr-diff/stream', methods=['GET'])
+def stream_pull_request_diff():
+    """
+    Stream a pull request's diff straight from GitHub
+
+    The body is passed through chunk by chunk as GitHub sends it, so memory
+    use does not depend on the size of the diff. Unlike /git/pr-diff/raw,
+    this always reflects the PR's current head and nothing is stored.
+
+    Query parameters:
+    - repoUrl: The GitHub repository URL
+    - prNumber: The pull request number
+    - path: (Optional, repeatable) Only pass through the diffs of these files
+
+    Returns:
+        The unified diff (text/x-diff) or JSON error
+    """
+    try:
+        repo_url = request.args.get('repoUrl')
+        if not repo_url:
+            return jsonify({'error': 'Missing required parameter: repoUrl'}), 400
+
+        try:
+            pr_number = int(request.args.get('prNumber', ''))
+        except ValueError:
+            return jsonify({'error': 'prNumber must be an integer'}), 400
+
+        repo_full_name = git_service.get_full_repo_name(repo_url)
+        if not repo_full_name:
+            return jsonify({'error': 'Invalid GitHub repository URL'}), 400
+
+        success, github_response = git_service.open_pull_request_diff(repo_full_name, pr_number)
+        if not success:
+            if github_response.get('rateLimited'):
+                return rate_limited_response(github_response)
+            status_code = 404 if github_response.get('statusCode') == 404 else 502
+            return jsonify({'error': github_response.get('error', 'Failed to get PR diff')}), status_code
+
+        paths = request.args.getlist('path')
+
+        def generate():
+            with github_response:
+                chunks = github_response.iter_content(64 * 1024)
+                if paths:
+                    chunks = rechunk(filter_diff(iter_lines(chunks), paths))
+                yield from chunks
+
+        return Response(stream_with_context(generate()), mimetype='text/x-diff')
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/webhook', methods=['POST'])
+def receive_webhook():
+    """
+    Receive a GitHub webhook delivery
+
+    Configure the repository (or organization) webhook with content type
+    application/json, the GITHUB_WEBHOOK_SECRET secret, and the push,
+    create and pull_request events.
+
+    Returns:
+        JSON response with the outcome of applying the event or error
+    """
+    try:
+        if not webhook_service.secret:
+            return jsonify({'error': 'Webhook secret is not configured'}), 503
+
+        body = request.get_data(cache=True)
+        if not webhook_service.verify_signature(body, request.headers.get('X-Hub-Signature-256')):
+            return jsonify({'error': 'Invalid signature'}), 401
+
+        event = request.headers.get('X-GitHub-Event')
+        delivery_id = request.headers.get('X-GitHub-Delivery')
+        if not event or not delivery_id:
+            return jsonify({'error': 'Missing X-GitHub-Event or X-GitHub-Delivery header'}), 400
+
+        if event == 'ping':
+            return jsonify({'message': 'pong'}), 200
+
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Payload must be a JSON object'}), 400
+
+        result, error = webhook_service.ingest(delivery_id, event, payload)
+        if error:
+            return jsonify({'error': error}), 500
+
+        return jsonify({'deliveryId': delivery_id, 'event': event, **result}), 200
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/webhook/events', methods=['GET'])
+@require_admin_token
+def get_webhook_events():
+    """
+    Get recently received GitHub webhook events (without payloads)
+
+    Query parameters:
+    - limit: (Optional) Maximum number of events, at most 500 (default: 50)
+    - event: (Optional) Only return this event type
+    - repoFullName: (Optional) Only return events of this repository (username/repo)
+
+    Returns:
+        JSON response with the events, newest first
+    """
+    try:
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+        events = webhook_service.get_events(
+            limit=max(1, min(limit, 500)),
+            event=request.args.get('event'),
+            repo_full_name=request.args.get('repoFullName')
+        )
+        return jsonify(events), 200
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/webhook/replay', methods=['POST'])
+@require_admin_token
+def replay_webhook_events():
+    """
+    Apply logged GitHub webhook events again, e.g. after restoring subtask data
+
+    Request body may contain:
+    - since: (Optional) Only replay events received at or after this ISO timestamp
+    - events: (Optional) Only replay these event types (default: push, create, pull_request)
+
+    Returns:
+        JSON response with the number of events replayed and subtasks modified
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        result, error = webhook_service.replay_events(data.get('since'), data.get('events'))
+        if error:
+            return jsonify({'error': error}), 500
+        return jsonify(result), 200
+
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/api-stats', methods=['GET'])
+def get_api_stats():
+    """
+    Get GitHub API call statistics for this process
+
+    Returns:
+        JSON response with call count, error count and latency (ms) per operation
+    """
+    try:
+        return jsonify(git_service.get_api_stats()), 200
+    except ServiceUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@git_blueprint.route('/git/rate-limit', methods=['GET'])
+def get_rate_limit():
+    """
+    Get the GitHub rate limit state tracked by this process
+
+    Returns:
+        JSON response with remaining quota, reset time, in-flight and queued
+        requests per token (tokens are identified by a hash prefix)
+    """
+    try:
+        return jsonify(git_service.get_rate_limit_state()), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from services.problem_service import ProblemService
 from models.problem import Problem
+from utils.lazy_service import LazyService, ServiceUnavailableError
 
 problem_blueprint = Blueprint('problem', __name__)
-problem_service = ProblemService()
+problem_service = LazyService(ProblemService)
 
 @problem_blueprint.route('/problems', methods=['GET'])
 def get_problems():
@@ -11,6 +13,8 @@ def get_problems():
         category = request.args.get('category')
         problems = problem_service.get_all_problems(category)
         return jsonify([problem.to_dict() for problem in problems]), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -21,6 +25,8 @@ def get_problem(problem_num):
         if not problem:
             return jsonify({'error': 'Problem not found'}), 404
         return jsonify(problem.to_dict()), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -32,6 +38,8 @@ def add_problem():
         if problem_service.add_problem(problem):
             return jsonify({'message': 'Problem added successfully'}), 201
         return jsonify({'error': 'Problem number already exists'}), 400
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -42,6 +50,8 @@ def update_problem(problem_num):
         if problem_service.update_problem(problem_num, data):
             return jsonify({'message': 'Problem updated successfully'}), 200
         return jsonify({'error': 'Problem not found'}), 404
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -51,5 +61,7 @@ def delete_problem(problem_num):
         if problem_service.delete_problem(problem_num):
             return jsonify({'message': 'Problem deleted successfully'}), 200
         return jsonify({'error': 'Problem not found'}), 404
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
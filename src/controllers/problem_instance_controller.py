@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from services.problem_instance_service import ProblemInstanceService
 from services.subtask_instance_service import SubtaskInstanceService
 from models.problem_instance import ProblemInstance
 from models.subtask_instance import SubtaskInstance
+from utils.lazy_service import LazyService, ServiceUnavailableError
 
 problem_instance_blueprint = Blueprint('problem_instance', __name__)
-problem_instance_service = ProblemInstanceService()
-subtask_instance_service = SubtaskInstanceService()
+problem_instance_service = LazyService(ProblemInstanceService)
+subtask_instance_service = LazyService(SubtaskInstanceService)
 
 @problem_instance_blueprint.route('/problem-instances/<problem_num>/<user_id>', methods=['GET'])
 def get_problem_instance(problem_num, user_id):
@@ -25,6 +27,8 @@ def get_problem_instance(problem_num, user_id):
         if not instance:
             return jsonify({'error': 'Problem instance not found'}), 404
         return jsonify(instance.to_dict()), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -47,6 +51,8 @@ def get_subtask_instances(instance_id):
 
         subtasks = subtask_instance_service.get_subtask_instances(instance_id)
         return jsonify([subtask.to_dict() for subtask in subtasks]), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -66,6 +72,8 @@ def get_problem_instance_by_id(instance_id):
         if not instance:
             return jsonify({'error': 'Problem instance not found'}), 404
         return jsonify(instance.to_dict()), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -88,6 +96,8 @@ def get_collaborators(instance_id):
 
         collaborators = problem_instance_service.get_collaborators(instance_id)
         return jsonify(collaborators), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -129,6 +139,8 @@ def create_problem_instance():
             'instanceId': instance_id
         }), 201
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -166,6 +178,8 @@ def add_collaborator(instance_id):
 
         return jsonify({'message': 'Collaborator added successfully'}), 200
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -201,6 +215,8 @@ def create_subtask_instance(instance_id):
             'subtaskId': subtask_id
         }), 201
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -240,5 +256,7 @@ def update_problem_instance(instance_id):
 
         return jsonify({'message': 'Problem instance updated successfully'}), 200
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from utils.fast_json import jsonify
 from services.subtask_instance_service import SubtaskInstanceService
+from utils.lazy_service import LazyService, ServiceUnavailableError
 from bson import ObjectId
 
 subtask_instance_blueprint = Blueprint('subtask_instance', __name__)
-subtask_instance_service = SubtaskInstanceService()
+subtask_instance_service = LazyService(SubtaskInstanceService)
 
 @subtask_instance_blueprint.route('/subtask-instances/<subtask_id>', methods=['GET'])
 def get_subtask_instance(subtask_id):
@@ -21,6 +23,8 @@ def get_subtask_instance(subtask_id):
         if not subtask:
             return jsonify({'error': 'Subtask instance not found'}), 404
         return jsonify(subtask.to_dict()), 200
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -60,6 +64,8 @@ def update_subtask_instance(instance_id, subtask_id):
 
         return jsonify({'message': 'Subtask instance updated successfully'}), 200
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -101,5 +107,7 @@ def update_acceptance_criteria(instance_id, subtask_id, criteria_id):
 
         return jsonify({'message': 'Acceptance criterion updated successfully'}), 200
 
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
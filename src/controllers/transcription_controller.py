@@ -1,26 +1,54 @@
-from flask import Blueprint, request, jsonify
-from services.transcription_service import TranscriptionService
+from flask import Blueprint, request
+from utils.fast_json import jsonify
+from flask_sock import Sock
+from utils.upload_limits import MAX_AUDIO_UPLOAD_SIZE, UploadRejected, limit_upload
+from utils.lazy_service import LazyService, ServiceUnavailableError
+import json
 import time
 
 transcription_blueprint = Blueprint('transcription', __name__)
-transcription_service = TranscriptionService()
+transcription_sock = Sock()
+
+def build_transcription_service():
+    # Imported on first use: the service loads speech_recognition, pydub and numpy
+    from services.transcription_service import TranscriptionService
+    return TranscriptionService()
+
+transcription_service = LazyService(build_transcription_service, 'TranscriptionService')
 
 @transcription_blueprint.route('/v1/transcribe', methods=['POST'])
+@limit_upload(
+    max_bytes=MAX_AUDIO_UPLOAD_SIZE + 64 * 1024,  # Allow for multipart overhead
+    validator=lambda filename, header: transcription_service.validate_upload_header(filename, header),
+    max_file_bytes=MAX_AUDIO_UPLOAD_SIZE
+)
 def transcribe_audio():
     """
     Endpoint to transcribe audio files.
     
     Expects:
-    - audio file in multipart/form-data
-    - format parameter (optional, defaults to 'wav')
+    - audio file in multipart/form-data (wav, webm, ogg, opus or mp3)
     - language parameter (optional, defaults to 'en-US')
     
     Returns:
     - JSON response with transcription data or error message
     """
     try:
+        # Parsing the form validates the upload as it streams in
+        try:
+            files = request.files
+        except UploadRejected as e:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_FILE',
+                    'message': e.message,
+                    'details': None
+                }
+            }), e.status_code
+
         # Check if the request has the file part
-        if 'audio' not in request.files:
+        if 'audio' not in files:
             return jsonify({
                 'success': False,
                 'error': {
@@ -30,7 +58,7 @@ def transcribe_audio():
                 }
             }), 400
             
-        audio_file = request.files['audio']
+        audio_file = files['audio']
         
         # Validate the file
         is_valid, error_message = transcription_service.is_valid_file(audio_file)
@@ -46,9 +74,21 @@ def transcribe_audio():
             
         # Get language parameter (optional)
         language = request.form.get('language', 'en-US')
-        
+
+        # Decode the audio
+        audio, error_message = transcription_service.decode_audio(audio_file)
+        if error_message:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_FILE',
+                    'message': error_message,
+                    'details': None
+                }
+            }), 400
+
         # Transcribe the audio
-        transcription, error = transcription_service.transcribe_audio(audio_file, language)
+        transcription, error = transcription_service.transcribe_audio(audio, language)
         
         if error:
             return jsonify({
@@ -66,6 +106,8 @@ def transcribe_audio():
             'data': transcription.to_dict()
         }), 200
         
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
@@ -75,3 +117,103 @@ def transcribe_audio():
                 'details': str(e)
             }
         }), 500
+
+@transcription_sock.route('/v1/transcribe/stream', bp=transcription_blueprint)
+def transcribe_audio_stream(ws):
+    """
+    WebSocket endpoint to transcribe audio while it is being recorded.
+
+    Expects:
+    - language query parameter (optional, defaults to 'en-US')
+    - sampleRate query parameter (optional, defaults to 16000)
+    - binary messages with 16-bit little-endian mono PCM audio
+    - a text message {"type": "stop"} once recording ends
+
+    Sends:
+    - {"type": "partial", ...} for every recognized utterance
+    - {"type": "final", "success": true, "data": ...} with the full transcription
+    - {"type": "error", "error": ...} on failure
+    """
+    language = request.args.get('language', 'en-US')
+    try:
+        sample_rate = int(request.args.get('sampleRate', 16000))
+    except ValueError:
+        sample_rate = 0
+    if sample_rate <= 0:
+        ws.send(json.dumps({
+            'type': 'error',
+            'error': {
+                'code': 'INVALID_STREAM',
+                'message': 'sampleRate must be a positive integer',
+                'details': None
+            }
+        }))
+        return
+
+    try:
+        session = transcription_service.open_stream(language, sample_rate)
+    except ServiceUnavailableError as e:
+        ws.send(json.dumps({
+            'type': 'error',
+            'error': {
+                'code': 'SERVICE_UNAVAILABLE',
+                'message': str(e),
+                'details': None
+            }
+        }))
+        return
+
+    try:
+        while True:
+            message = ws.receive(timeout=0.1)
+
+            # Push recognition results as soon as they are available
+            for event in session.drain_events():
+                ws.send(json.dumps(event))
+
+            if message is None:
+                continue
+
+            if isinstance(message, bytes):
+                error = session.feed(message)
+                if error:
+                    ws.send(json.dumps({
+                        'type': 'error',
+                        'error': {
+                            'code': 'INVALID_STREAM',
+                            'message': error,
+                            'details': None
+                        }
+                    }))
+                    return
+                continue
+
+            try:
+                control = json.loads(message)
+            except ValueError:
+                control = {}
+            if control.get('type') == 'stop':
+                break
+
+        transcription, error = session.finish()
+        for event in session.drain_events():
+            ws.send(json.dumps(event))
+
+        if error:
+            ws.send(json.dumps({
+                'type': 'error',
+                'error': {
+                    'code': 'TRANSCRIPTION_FAILED',
+                    'message': error,
+                    'details': None
+                }
+            }))
+            return
+
+        ws.send(json.dumps({
+            'type': 'final',
+            'success': True,
+            'data': transcription.to_dict()
+        }))
+    finally:
+        session.close()
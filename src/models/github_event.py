@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+class GitHubEvent:
+    """A webhook delivery from GitHub, as recorded in the event log."""
+
+    def __init__(self,
+                 delivery_id: str,
+                 event: str,
+                 payload: Dict[str, Any],
+                 action: Optional[str] = None,
+                 repo_full_name: Optional[str] = None,
+                 branch: Optional[str] = None,
+                 sender: Optional[str] = None,
+                 received_at: Optional[datetime] = None,
+                 processed_at: Optional[datetime] = None,
+                 result: Optional[Dict[str, Any]] = None,
+                 error: Optional[str] = None):
+        self.delivery_id = delivery_id
+        self.event = event
+        self.payload = payload
+        self.action = action
+        self.repo_full_name = repo_full_name
+        self.branch = branch
+        self.sender = sender
+        self.received_at = received_at or datetime.now()
+        self.processed_at = processed_at
+        self.result = result
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the event to a dictionary (the delivery ID is the document _id)."""
+        return {
+            '_id': self.delivery_id,
+            'event': self.event,
+            'action': self.action,
+            'repoFullName': self.repo_full_name,
+            'branch': self.branch,
+            'sender': self.sender,
+            'payload': self.payload,
+            'receivedAt': self.received_at.isoformat() if self.received_at else None,
+            'processedAt': self.processed_at.isoformat() if self.processed_at else None,
+            'result': self.result,
+            'error': self.error
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'GitHubEvent':
+        """Create a GitHubEvent object from a dictionary."""
+        def parse_datetime(value):
+            if not value:
+                return None
+            try:
+                return datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                return None
+
+        return GitHubEvent(
+            delivery_id=data.get('_id'),
+            event=data.get('event'),
+            payload=data.get('payload', {}),
+            action=data.get('action'),
+            repo_full_name=data.get('repoFullName'),
+            branch=data.get('branch'),
+            sender=data.get('sender'),
+            received_at=parse_datetime(data.get('receivedAt')),
+            processed_at=parse_datetime(data.get('processedAt')),
+            result=data.get('result'),
+            error=data.get('error')
+        )
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class PRDiff:
+    """Stored diff of a pull request, fetched from GitHub in the background."""
+
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self,
+                 repo_full_name: str,
+                 pr_number: int,
+                 status: str = PENDING,
+                 head_sha: Optional[str] = None,
+                 files: List[Dict] = None,
+                 additions: int = 0,
+                 deletions: int = 0,
+                 error: Optional[str] = None,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None):
+        self.repo_full_name = repo_full_name
+        self.pr_number = pr_number
+        self.status = status
+        self.head_sha = head_sha
+        self.files = files or []
+        self.additions = additions
+        self.deletions = deletions
+        self.error = error
+        self.created_at = created_at or datetime.now()
+        self.updated_at = updated_at or datetime.now()
+
+    def to_dict(self) -> Dict:
+        """Convert the PR diff object to a dictionary (file summaries only, no diff text)."""
+        return {
+            'repoFullName': self.repo_full_name,
+            'prNumber': self.pr_number,
+            'status': self.status,
+            'headSha': self.head_sha,
+            'files': self.files,
+            'fileCount': len(self.files),
+            'additions': self.additions,
+            'deletions': self.deletions,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> 'PRDiff':
+        """Create a PRDiff object from a dictionary."""
+        def parse_datetime(value):
+            if not value:
+                return None
+            try:
+                return datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                return None
+
+        return PRDiff(
+            repo_full_name=data.get('repoFullName'),
+            pr_number=data.get('prNumber'),
+            status=data.get('status', PRDiff.PENDING),
+            head_sha=data.get('headSha'),
+            files=data.get('files', []),
+            additions=data.get('additions', 0),
+            deletions=data.get('deletions', 0),
+            error=data.get('error'),
+            created_at=parse_datetime(data.get('createdAt')),
+            updated_at=parse_datetime(data.get('updatedAt'))
+        )
@@ -1,20 +1,24 @@
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 class Transcription:
     def __init__(self, 
                  transcription: str, 
-                 confidence: float, 
+                 confidence: Optional[float], 
                  processing_time: float, 
                  word_count: int,
                  language: str = "en-US",
-                 timestamp: Optional[datetime] = None):
+                 timestamp: Optional[datetime] = None,
+                 segments: Optional[List[Dict]] = None,
+                 cache_hit: bool = False):
         self.transcription = transcription
         self.confidence = confidence
         self.processing_time = processing_time
         self.word_count = word_count
         self.language = language
         self.timestamp = timestamp or datetime.now()
+        self.segments = segments or []
+        self.cache_hit = cache_hit
 
     def to_dict(self) -> Dict:
         """Convert the transcription object to a dictionary."""
@@ -24,7 +28,9 @@ class Transcription:
             'processingTime': self.processing_time,
             'wordCount': self.word_count,
             'language': self.language,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp.isoformat(),
+            'segments': self.segments,
+            'cacheHit': self.cache_hit
         }
 
     @staticmethod
@@ -43,5 +49,7 @@ class Transcription:
             processing_time=data.get('processingTime', 0.0),
             word_count=data.get('wordCount', 0),
             language=data.get('language', 'en-US'),
-            timestamp=timestamp
+            timestamp=timestamp,
+            segments=data.get('segments', []),
+            cache_hit=data.get('cacheHit', False)
         )
@@ -1,5 +1,4 @@
 from flask import current_app, session, url_for
-from authlib.integrations.flask_client import OAuth
 from services.mongo_service import mongo_service
 
 def log_user_activity(user_data, activity_type):
@@ -62,6 +61,8 @@ def log_user_activity(user_data, activity_type):
 
 class GitHubAuthService:
     def __init__(self):
+        # authlib is only needed for this OAuth client, so it is imported on first use
+        from authlib.integrations.flask_client import OAuth
         self.oauth = OAuth(current_app)
         self.github = self.oauth.register(
             name='github',
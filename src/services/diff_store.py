@@ -0,0 +1,137 @@
+import hashlib
+import os
+import zlib
+from typing import Iterator, Optional
+
+import gridfs
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+
+class DiffBlobStore:
+    """
+    Content-addressed, compressed storage for diff text.
+
+    Blobs are keyed by the SHA-256 of their uncompressed content, so the
+    same content is stored once however many PRs contain it. Small blobs are
+    kept inline in the pr_diff_blobs collection, larger ones in GridFS.
+    Reads are streamed and decompressed chunk by chunk.
+    """
+
+    read_chunk_size = 64 * 1024
+
+    def __init__(self, db, compression: Optional[str] = None):
+        self.collection = db.pr_diff_blobs
+        self.gridfs = gridfs.GridFS(db, collection='pr_diff_blobs')
+        self.gridfs_threshold = int(os.getenv('PR_DIFF_GRIDFS_THRESHOLD', str(1024 * 1024)))
+        self.compression_level = int(os.getenv('PR_DIFF_COMPRESSION_LEVEL', '6'))
+
+        compression = (compression or os.getenv('PR_DIFF_COMPRESSION', ZSTD)).lower()
+        if compression not in (ZSTD, GZIP):
+            raise ValueError(f"Unknown PR diff compression '{compression}'. Available: {ZSTD}, {GZIP}")
+        if compression == ZSTD and zstandard is None:
+            print("zstandard is not installed, storing PR diffs with gzip")
+            compression = GZIP
+        self.compression = compression
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, data: bytes) -> str:
+        """
+        Store data unless a blob with the same content already exists.
+
+        Returns:
+            The blob's content hash
+        """
+        blob_hash = self.content_hash(data)
+        if self.collection.count_documents({'_id': blob_hash}, limit=1):
+            return blob_hash
+
+        compressed = self._compress(data)
+        blob = {
+            '_id': blob_hash,
+            'encoding': self.compression,
+            'size': len(data),
+            'storedSize': len(compressed)
+        }
+        if len(compressed) > self.gridfs_threshold:
+            blob['gridfsId'] = self.gridfs.put(compressed, filename=blob_hash)
+        else:
+            blob['data'] = Binary(compressed)
+
+        try:
+            self.collection.insert_one(blob)
+        except DuplicateKeyError:
+            # Stored concurrently by another writer; drop our GridFS copy
+            if 'gridfsId' in blob:
+                self.gridfs.delete(blob['gridfsId'])
+        return blob_hash
+
+    def open(self, blob_hash: str) -> Iterator[bytes]:
+        """
+        Stream a blob's uncompressed content.
+
+        Raises:
+            KeyError: if no blob with this hash exists
+        """
+        blob = self.collection.find_one({'_id': blob_hash})
+        if blob is None:
+            raise KeyError(blob_hash)
+        return self._decompress(blob['encoding'], self._iter_stored(blob))
+
+    def read(self, blob_hash: str) -> bytes:
+        """Read a blob's uncompressed content into memory."""
+        return b''.join(self.open(blob_hash))
+
+    def _iter_stored(self, blob) -> Iterator[bytes]:
+        if 'gridfsId' in blob:
+            stream = self.gridfs.get(blob['gridfsId'])
+            try:
+                while True:
+                    chunk = stream.read(self.read_chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                stream.close()
+        else:
+            data = bytes(blob['data'])
+            for offset in range(0, len(data), self.read_chunk_size):
+                yield data[offset:offset + self.read_chunk_size]
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == ZSTD:
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 31)  # gzip container
+        return compressor.compress(data) + compressor.flush()
+
+    @staticmethod
+    def _decompress(encoding: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        if encoding == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Reading zstd-compressed PR diffs requires the 'zstandard' package")
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            for chunk in chunks:
+                output = decompressor.decompress(chunk)
+                if output:
+                    yield output
+            return
+
+        decompressor = zlib.decompressobj(31)
+        for chunk in chunks:
+            output = decompressor.decompress(chunk)
+            if output:
+                yield output
+        output = decompressor.flush()
+        if output:
+            yield output
@@ -0,0 +1,184 @@
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+from services.smtp_connection import SMTPConnection
+
+
+class OutboundEmail:
+    def __init__(self, message: Message, from_addr: str, recipients: List[str], kind: str, context: Any = None):
+        self.id = str(uuid4())
+        self.message = message
+        self.from_addr = from_addr
+        self.recipients = recipients
+        self.kind = kind
+        self.context = context
+        self.attempts = 0
+        self.delivered = False  # whether any recipient has accepted it so far
+        self.enqueued_at = time.time()
+
+
+# Called with (email, delivered recipients, failed recipients mapped to an
+# error message) once the outcome for those recipients is final. An email
+# whose recipients were partly refused with a 4xx reply is reported again
+# after the retry for the rest.
+ResultCallback = Callable[[OutboundEmail, List[str], Dict[str, str]], None]
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a send error is worth retrying: network errors and 4xx replies are, 5xx replies are not."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class EmailQueue:
+    """
+    Sends queued emails from a background thread over one persistent SMTP
+    connection.
+
+    Transient failures are retried with exponential backoff, and an idle
+    connection is kept alive with NOOPs. Emails live in memory only, so
+    anything still queued when the process is killed is lost; stop() drains
+    the queue on a normal shutdown.
+    """
+
+    def __init__(self, connection: SMTPConnection, on_result: ResultCallback, max_size: int = 1000,
+                 max_retries: int = 3, retry_backoff: float = 2.0, max_backoff: float = 300.0,
+                 keepalive_interval: float = 60.0):
+        self.connection = connection
+        self.on_result = on_result
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.keepalive_interval = keepalive_interval
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._retries = []  # heap of (due, sequence, email)
+        self._sequence = itertools.count()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self.stats = {'enqueued': 0, 'sent': 0, 'failed': 0, 'retried': 0, 'rejected': 0}
+        self._stats_lock = threading.Lock()  # enqueue() runs on request threads
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='email-queue', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, email: OutboundEmail) -> bool:
+        """Queue an email for delivery; returns False if the queue is full or stopping."""
+        if self._stopping:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(email)
+        except queue.Full:
+            self._count('rejected')
+            return False
+        self._count('enqueued')
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Send what is queued (retrying without waiting for backoff) and close the connection."""
+        if self._thread is None or self._stopping:
+            return
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'queued': self._queue.qsize(),
+            'pendingRetries': len(self._retries),
+            'connects': self.connection.connects,
+            'connected': self.connection.connected
+        }
+
+    def _run(self):
+        while True:
+            # Due retries go first (all of them when shutting down, without waiting)
+            if self._retries and (self._stopping or self._retries[0][0] <= time.monotonic()):
+                self._deliver(heapq.heappop(self._retries)[2])
+                continue
+
+            timeout = self.keepalive_interval
+            if self._retries:
+                timeout = min(timeout, self._retries[0][0] - time.monotonic())
+
+            try:
+                email = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if not self._retries and self.connection.connected:
+                    self.connection.noop()
+                continue
+
+            if email is None:
+                break
+            self._deliver(email)
+
+        while self._retries:
+            self._deliver(heapq.heappop(self._retries)[2])
+        self.connection.close()
+
+    def _deliver(self, email: OutboundEmail):
+        email.attempts += 1
+        try:
+            refused = self.connection.send(email.message, email.from_addr, email.recipients)
+        except smtplib.SMTPRecipientsRefused as e:
+            # Every RCPT was refused; handled per recipient below
+            refused = e.recipients
+        except Exception as e:
+            print(f"Failed to send {email.kind} email {email.id} (attempt {email.attempts}): {str(e)}")
+            if is_transient(e) and self._schedule_retry(email):
+                return
+            self._finish(email)
+            self._report(email, [], {recipient: str(e) for recipient in email.recipients})
+            return
+
+        delivered = [recipient for recipient in email.recipients if recipient not in refused]
+        failed = {recipient: f"{code} {response.decode('utf-8', 'replace')}" for recipient, (code, response) in refused.items()}
+        email.delivered = email.delivered or bool(delivered)
+
+        # Recipients refused with a 4xx reply (e.g. mailbox busy) are retried on their own
+        retry = [recipient for recipient, (code, _) in refused.items() if 400 <= code < 500]
+        if retry and self._schedule_retry(email, retry):
+            failed = {recipient: error for recipient, error in failed.items() if recipient not in retry}
+        else:
+            self._finish(email)
+        if delivered or failed:
+            self._report(email, delivered, failed)
+
+    def _finish(self, email: OutboundEmail):
+        """Count an email once no retry is left: sent if any recipient accepted it, failed otherwise."""
+        self._count('sent' if email.delivered else 'failed')
+
+    def _schedule_retry(self, email: OutboundEmail, recipients: Optional[List[str]] = None) -> bool:
+        if self._stopping or email.attempts > self.max_retries:
+            return False
+        if recipients is not None:
+            email.recipients = recipients
+        delay = min(self.max_backoff, self.retry_backoff * (2 ** (email.attempts - 1)))
+        heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), email))
+        self._count('retried')
+        return True
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            self.stats[counter] += 1
+
+    def _report(self, email: OutboundEmail, delivered: List[str], failed: Dict[str, str]):
+        try:
+            self.on_result(email, delivered, failed)
+        except Exception as e:
+            print(f"Error reporting result of email {email.id}: {str(e)}")
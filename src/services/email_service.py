@@ -1,4 +1,4 @@
-import smtplib
+import atexit
 import json
 import os
 from datetime import datetime
@@ -7,11 +7,24 @@ from email.mime.multipart import MIMEMultipart
 from email.header import Header
 from dotenv import load_dotenv
 from uuid import uuid4
+from services.email_queue import EmailQueue, OutboundEmail
+from services.smtp_connection import SMTPConnection
+from utils.jsonl_log import JSONLinesLog
+from utils.smtp_sink import SMTPSink
 
 # Load environment variables at the module level
 load_dotenv()
 
 class EmailService:
+    """
+    Sends contact form emails through a background queue.
+
+    Messages are queued and delivered by EmailQueue's worker thread over one
+    persistent, authenticated SMTP connection, so the contact endpoint does not
+    wait for SMTP and the TLS handshake and login happen once per connection
+    instead of once per message.
+    """
+
     def __init__(self):
         # Ensure environment variables are loaded
         if not os.getenv('SMTP_SERVER'):
@@ -23,128 +36,88 @@ class EmailService:
         self.password = os.getenv('EMAIL_PASSWORD', '').replace('\xa0', ' ').strip()
         self.use_tls = os.getenv('SMTP_USE_TLS', 'True').lower() == 'true'
         self.use_ssl = os.getenv('SMTP_USE_SSL', 'False').lower() == 'true'
-        self.session_log_file = 'email_sessions.json'
+        self.session_log = JSONLinesLog(
+            os.getenv('EMAIL_SESSION_LOG', 'email_sessions.jsonl'),
+            max_bytes=int(os.getenv('EMAIL_SESSION_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            backup_count=int(os.getenv('EMAIL_SESSION_LOG_BACKUPS', '30')),
+            flush_interval=float(os.getenv('EMAIL_SESSION_LOG_FLUSH_INTERVAL', '1'))
+        )
+        self._import_legacy_log('email_sessions.json')
         
         # Get founders' emails and split into list
         founders_email_str = os.getenv('FOUNDERS_EMAIL', '').strip()
         self.founders_emails = [email.strip() for email in founders_email_str.split(',') if email.strip()]
 
+        # Local development: capture emails in an in-process SMTP sink instead of sending them
+        self.sink = None
+        if os.getenv('SMTP_SINK', 'False').lower() == 'true':
+            self.sink = SMTPSink(
+                port=int(os.getenv('SMTP_SINK_PORT', '0')),
+                latency=float(os.getenv('SMTP_SINK_LATENCY', '0'))
+            ).start()
+            self.smtp_server, self.smtp_port = self.sink.address
+            self.sender_email = self.sender_email or 'noreply@localhost'
+            self.use_tls = False
+            self.use_ssl = False
+            print(f"SMTP sink mode: emails are captured by the local sink at {self.smtp_server}:{self.smtp_port}")
+
         # Validate required settings
-        if not all([self.smtp_server, self.smtp_port, self.sender_email, self.password]):
+        elif not all([self.smtp_server, self.smtp_port, self.sender_email, self.password]):
             raise ValueError("Missing required email configuration. Please check your .env file.")
 
-    def send_confirmation_email(self, contact):
-        try:
-            if not all([self.smtp_server, self.smtp_port, self.sender_email, self.password]):
-                raise ValueError("Email configuration is incomplete")
-
-            message = MIMEMultipart()
-            message["From"] = self.sender_email
-            message["To"] = contact.email
-            message["Subject"] = "We've Received Your Message"
-
-            body = (
-                f"Dear {contact.name},\n\n"
-                "Thank you for reaching out to us. This email confirms that we've received your message.\n\n"
-                "We'll review your inquiry and get back to you within 24 hours.\n\n"
-                f"For reference, here's a copy of your message:\n"
-                f"Subject: {contact.subject}\n"
-                f"Message:\n{contact.message}\n\n"
-                "Best regards,\nThe Support Team"
-            )
-
-            message.attach(MIMEText(body, "plain", "utf-8"))
-
-            print(f"Attempting to send confirmation email using SMTP server: {self.smtp_server}:{self.smtp_port}")
-            
-            smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
-            with smtp_class(self.smtp_server, self.smtp_port) as server:
-                if self.use_tls:
-                    print("Starting TLS...")
-                    server.starttls()
-                print(f"Logging in as {self.sender_email}...")
-                server.login(self.sender_email, self.password)
-                print(f"Sending confirmation email to {contact.email}...")
-                server.send_message(message)
-                print("Confirmation email sent successfully!")
-
-            self.log_session(contact, success=True, recipient=contact.email, is_confirmation=True)
-            return True
+        self.connection = SMTPConnection(
+            self.smtp_server,
+            self.smtp_port,
+            username=self.sender_email,
+            password=self.password,
+            use_tls=self.use_tls,
+            use_ssl=self.use_ssl,
+            timeout=float(os.getenv('SMTP_TIMEOUT', '30'))
+        )
+        self.queue = EmailQueue(
+            self.connection,
+            self._on_result,
+            max_size=int(os.getenv('EMAIL_QUEUE_MAX_SIZE', '1000')),
+            max_retries=int(os.getenv('SMTP_MAX_RETRIES', '3')),
+            retry_backoff=float(os.getenv('SMTP_RETRY_BACKOFF', '2')),
+            keepalive_interval=float(os.getenv('SMTP_KEEPALIVE_INTERVAL', '60'))
+        )
+        # Deliver what is still queued when the process exits normally
+        atexit.register(self.queue.stop, float(os.getenv('EMAIL_QUEUE_DRAIN_TIMEOUT', '10')))
 
-        except Exception as e:
-            print(f"Error sending confirmation email: {str(e)}")
-            print(f"SMTP Server: {self.smtp_server}")
-            print(f"SMTP Port: {self.smtp_port}")
-            print(f"Sender Email: {self.sender_email}")
-            print(f"Password set: {'Yes' if self.password else 'No'}")
+    def send_confirmation_email(self, contact):
+        """Queue the confirmation email to the person who sent the contact message."""
+        message = self._build_confirmation(contact)
+        if not self.queue.enqueue(OutboundEmail(message, self.sender_email, [contact.email], 'confirmation', contact)):
+            print(f"Email queue is full, dropping confirmation email to {contact.email}")
             self.log_session(contact, success=False, recipient=contact.email, is_confirmation=True)
             return False
+        return True
 
     def send_email_support(self, contact):
+        """
+        Queue the notification to the founders and the confirmation to the sender.
+
+        Returns:
+            True if every email was queued; delivery happens in the background
+            and its outcome is recorded in the session log
+        """
         try:
-            if not all([self.smtp_server, self.smtp_port, self.sender_email, self.password]):
-                raise ValueError("Email configuration is incomplete")
-
-            print("Starting email send process...")
-            print(f"SMTP Server: {self.smtp_server}")
-            print(f"SMTP Port: {self.smtp_port}")
-            print(f"TLS Enabled: {self.use_tls}")
-            print(f"SSL Enabled: {self.use_ssl}")
-
-            # First sanitize all input data
-            name = contact.name.replace('\xa0', ' ').strip()
-            email = contact.email.replace('\xa0', ' ').strip()
-            msg = contact.message.replace('\xa0', ' ').strip()
-
-            print(f"Sanitized inputs - Name: {name}, Email: {email}")
-
-            # Send to founders
-            all_founders_success = True
-            for recipient_email in self.founders_emails:
-                message = MIMEMultipart()
-                message["From"] = self.sender_email
-                message["To"] = recipient_email
-                message["Subject"] = contact.subject
-
-                body = (
-                    f"New message from: {name}\n"
-                    f"Email: {email}\n\n"
-                    f"Message:\n{msg}"
-                )
-
-                print(f"Creating email body for {recipient_email}...")
-                message.attach(MIMEText(body, "plain", "utf-8"))
-
-                smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
-                try:
-                    print(f"Connecting to SMTP server using {'SSL' if self.use_ssl else 'standard'} connection...")
-                    with smtp_class(self.smtp_server, self.smtp_port) as server:
-                        if self.use_tls:
-                            print("Starting TLS...")
-                            server.starttls()
-                        
-                        print("Attempting login...")
-                        server.login(self.sender_email, self.password)
-                        
-                        print(f"Sending message to {recipient_email}...")
-                        server.send_message(message)
-                        print(f"Message sent successfully to {recipient_email}!")
-                    
-                    self.log_session(contact, success=True, recipient=recipient_email)
-                except Exception as e:
-                    print(f"Failed to send to {recipient_email}: {str(e)}")
-                    print(f"SMTP Server: {self.smtp_server}")
-                    print(f"SMTP Port: {self.smtp_port}")
-                    print(f"Sender Email: {self.sender_email}")
-                    print(f"Password set: {'Yes' if self.password else 'No'}")
-                    self.log_session(contact, success=False, recipient=recipient_email)
-                    all_founders_success = False
-
-            # Send confirmation email to user
-            confirmation_success = self.send_confirmation_email(contact)
-
-            # Return True only if both operations succeeded
-            return all_founders_success and confirmation_success
+            # One message to all founders, sent in a single SMTP transaction
+            all_founders_queued = True
+            if self.founders_emails:
+                message = self._build_notification(contact, self.founders_emails)
+                email = OutboundEmail(message, self.sender_email, list(self.founders_emails), 'notification', contact)
+                if not self.queue.enqueue(email):
+                    print(f"Email queue is full, dropping notification to {', '.join(self.founders_emails)}")
+                    for recipient_email in self.founders_emails:
+                        self.log_session(contact, success=False, recipient=recipient_email)
+                    all_founders_queued = False
+
+            confirmation_queued = self.send_confirmation_email(contact)
+
+            # Return True only if both were queued
+            return all_founders_queued and confirmation_queued
 
         except Exception as e:
             print(f"Detailed error information:")
@@ -154,6 +127,64 @@ class EmailService:
             print(f"Stack trace: {traceback.format_exc()}")
             return False
 
+    def get_queue_stats(self):
+        return self.queue.get_stats()
+
+    def get_sink_messages(self, limit=None):
+        """Messages captured by the SMTP sink, newest first, or None when not in sink mode."""
+        if self.sink is None:
+            return None
+        return self.sink.get_messages(limit)
+
+    def _build_confirmation(self, contact):
+        message = MIMEMultipart()
+        message["From"] = self.sender_email
+        message["To"] = contact.email
+        message["Subject"] = "We've Received Your Message"
+
+        body = (
+            f"Dear {contact.name},\n\n"
+            "Thank you for reaching out to us. This email confirms that we've received your message.\n\n"
+            "We'll review your inquiry and get back to you within 24 hours.\n\n"
+            f"For reference, here's a copy of your message:\n"
+            f"Subject: {contact.subject}\n"
+            f"Message:\n{contact.message}\n\n"
+            "Best regards,\nThe Support Team"
+        )
+
+        message.attach(MIMEText(body, "plain", "utf-8"))
+        return message
+
+    def _build_notification(self, contact, recipient_emails):
+        # First sanitize all input data
+        name = contact.name.replace('\xa0', ' ').strip()
+        email = contact.email.replace('\xa0', ' ').strip()
+        msg = contact.message.replace('\xa0', ' ').strip()
+
+        message = MIMEMultipart()
+        message["From"] = self.sender_email
+        message["To"] = ", ".join(recipient_emails)
+        message["Subject"] = contact.subject
+
+        body = (
+            f"New message from: {name}\n"
+            f"Email: {email}\n\n"
+            f"Message:\n{msg}"
+        )
+
+        message.attach(MIMEText(body, "plain", "utf-8"))
+        return message
+
+    def _on_result(self, email, delivered, failed):
+        """Record the outcome of a delivered (or abandoned) email in the session log."""
+        is_confirmation = email.kind == 'confirmation'
+        for recipient in delivered:
+            print(f"{email.kind.capitalize()} email sent to {recipient}")
+            self.log_session(email.context, success=True, recipient=recipient, is_confirmation=is_confirmation)
+        for recipient, error in failed.items():
+            print(f"Failed to send {email.kind} email to {recipient}: {error}")
+            self.log_session(email.context, success=False, recipient=recipient, is_confirmation=is_confirmation)
+
     def log_session(self, contact, success=True, recipient=None, is_confirmation=False):
         session_data = {
             "id": str(uuid4()),
@@ -167,16 +198,48 @@ class EmailService:
         }
 
         try:
-            if os.path.exists(self.session_log_file):
-                with open(self.session_log_file, 'r') as f:
-                    data = json.load(f)
-            else:
-                data = {"sessions": []}
-
-            data["sessions"].append(session_data)
-
-            with open(self.session_log_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.session_log.append(session_data)
+        except Exception as e:
+            print(f"Error logging session: {str(e)}")
+
+    def get_sessions(self, status=None, session_type=None, to_email=None, since=None, until=None, limit=100):
+        """
+        Get logged email sessions, newest first.
+
+        Args:
+            status: Only 'success' or only 'failed' sessions
+            session_type: Only 'notification' or only 'confirmation' sessions
+            to_email: Only sessions sent to this address
+            since: Only sessions at or after this ISO timestamp
+            until: Only sessions before this ISO timestamp
+            limit: Maximum number of sessions
+
+        Returns:
+            List of sessions
+        """
+        filters = {'status': status, 'type': session_type, 'to_email': to_email}
+        return self.session_log.query(
+            filters={key: value for key, value in filters.items() if value is not None},
+            since=since,
+            until=until,
+            limit=limit
+        )
+
+    def _import_legacy_log(self, legacy_file):
+        """Move the sessions of the old single-document JSON log into the session log, once."""
+        migrated_file = f"{legacy_file}.migrated"
+        try:
+            # The rename makes sure only one worker process imports it
+            os.rename(legacy_file, migrated_file)
+        except OSError:
+            return
 
+        try:
+            with open(migrated_file, 'r') as f:
+                sessions = json.load(f).get("sessions", [])
+            for session_data in sessions:
+                self.session_log.append(session_data)
+            self.session_log.flush()
+            print(f"Imported {len(sessions)} email sessions from {legacy_file}")
         except Exception as e:
-            print(f"Error logging session: {str(e)}")
\ No newline at end of file
+            print(f"Error importing {legacy_file}: {str(e)}")
@@ -1,18 +1,23 @@
 import os
-import speech_recognition as sr
 from werkzeug.utils import secure_filename
-import openai
 import json
 import re
 
+from utils import metrics
 
-openai.api_key = os.environ.get("OPENAI_API_KEY")
 
 class FeedbackService:
     def __init__(self):
+        # speech_recognition and openai are slow to import and only needed
+        # here, so they are imported when the service is first used
+        import speech_recognition as sr
+        import openai
+        openai.api_key = os.environ.get("OPENAI_API_KEY")
+
         self.recognizer = sr.Recognizer()
         self.allowed_formats = {'wav'}
         self.max_file_size = 10 * 1024 * 1024  # 10MB limit
+        self.openai_timeout = float(os.getenv('OPENAI_TIMEOUT', '60'))
 
     def build_prompt(self, mode, question, text):
         if mode == "pr":
@@ -43,16 +48,19 @@ class FeedbackService:
         """
         Generates feedback using OpenAI's GPT model.
         """
-        try:
+        import openai
 
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful interviewer."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,  # Lower temperature for more consistent outputs
-            )
+        try:
+            with metrics.span('openai', 'chat_completion'):
+                response = openai.ChatCompletion.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful interviewer."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,  # Lower temperature for more consistent outputs
+                    request_timeout=self.openai_timeout
+                )
 
             feedback_text = response.choices[0].message.content.strip()
             return feedback_text
@@ -1,10 +1,11 @@
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
-import requests
-from github import Github
 from dotenv import load_dotenv
 from urllib.parse import urlparse
+from services.github_client import GitHubClient
+from services.github_rate_limiter import INTERACTIVE, GitHubRateLimitError, github_rate_limiter
 
 load_dotenv()
 
@@ -21,22 +22,24 @@ class GitService:
         # but we'll use it for consistency with the reference code
         self.github_user = "github-user"  # Default value, not used in API calls
 
-        # Initialize PyGithub client
-        self.github = Github(self.github_token)
+        # Pooled keep-alive transport used for every GitHub API call
+        self.client = GitHubClient(self.github_token, self.github_user)
 
-        # Create a session for direct API calls
-        self.session = self._create_session()
+        # Parallel ref creation for bulk provisioning; the rate limiter still
+        # caps what is actually in flight against GitHub
+        self.bulk_concurrency = int(os.getenv('GITHUB_BULK_CONCURRENCY', '8'))
 
-    def _create_session(self) -> requests.Session:
-        """Create a session for GitHub API requests"""
-        # Following the pattern from the reference code
-        session = requests.Session()
-        # Use basic auth with token as password (same as reference code)
-        session.auth = (self.github_user, self.github_token)
-        session.headers.update({
-            'Accept': 'application/vnd.github.v3+json'
-        })
-        return session
+    def get_api_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-operation GitHub API call counts and latency"""
+        return self.client.get_stats()
+
+    def get_rate_limit_state(self) -> Dict[str, Dict]:
+        """Remaining quota, reset time and queue depth per GitHub token"""
+        return github_rate_limiter.snapshot()
+
+    def _rate_limited(self, error: GitHubRateLimitError) -> Dict[str, Any]:
+        print(f"GitHub rate limit: {str(error)}")
+        return {"error": str(error), "rateLimited": True, "retryAfter": error.retry_after}
 
     def extract_repo_info(self, repo_url: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -97,35 +100,44 @@ class GitService:
 
         Returns:
             True if branch exists, False otherwise
+
+        Raises:
+            GitHubRateLimitError: If the rate limiter could not schedule the call
         """
         try:
-            url = f"https://api.github.com/repos/{repo_full_name}/git/ref/heads/{branch_name}"
-            print(f"Checking if branch exists: {url}")
-            response = self.session.get(url)
+            path = f"/repos/{repo_full_name}/git/ref/heads/{branch_name}"
+            print(f"Checking if branch exists: {path}")
+            response = self.client.get_cached(path, operation='check_branch_exists')
             print(f"Response status: {response.status_code}")
             print(f"Response body: {response.text}")
             return response.status_code == 200
+        except GitHubRateLimitError:
+            # Not an answer about the branch; callers report it as a 429
+            raise
         except Exception as e:
             print(f"Error checking branch: {str(e)}")
             return False
 
-    def get_branch_sha(self, repo_full_name: str, branch_name: str = "main") -> Optional[str]:
+    def get_branch_sha(self, repo_full_name: str, branch_name: str = "main", revalidate: bool = False) -> Optional[str]:
         """
         Get the SHA of the latest commit on a branch
 
         Args:
             repo_full_name: Full repository name (username/repo)
             branch_name: Name of the branch (default: main)
+            revalidate: Check with GitHub instead of trusting a fresh cached read
 
         Returns:
             SHA of the latest commit or None if branch not found
+
+        Raises:
+            GitHubRateLimitError: If the rate limiter could not schedule the call
         """
         try:
-            # Following the pattern from the reference code
-            url = f"https://api.github.com/repos/{repo_full_name}/branches/{branch_name}"
-            print(f"Getting SHA for branch '{branch_name}' from URL: {url}")
+            path = f"/repos/{repo_full_name}/branches/{branch_name}"
+            print(f"Getting SHA for branch '{branch_name}' from: {path}")
 
-            response = self.session.get(url)
+            response = self.client.get_cached(path, operation='get_branch_sha', revalidate=revalidate)
             print(f"Response status: {response.status_code}")
 
             if response.status_code > 200:
@@ -137,58 +149,163 @@ class GitService:
             sha = data['commit']['sha']
             print(f"Found SHA: {sha}")
             return sha
+        except GitHubRateLimitError:
+            # Not an answer about the branch; callers report it as a 429
+            raise
         except Exception as e:
             print(f"Error getting branch SHA: {str(e)}")
             return None
 
-    def create_branch(self, repo_full_name: str, new_branch_name: str, base_branch_name: str = "main") -> Tuple[bool, Dict[str, Any]]:
+    def get_base_sha(self, repo_full_name: str, base_branch_name: str = "main") -> Optional[str]:
+        """
+        Get the current SHA to branch off from
+
+        The branch is always checked with GitHub so a push to the base is seen
+        immediately; the check is a conditional request, and an unchanged
+        branch comes back as a 304 that does not use up rate limit quota.
+
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            base_branch_name: Name of the base branch (default: main)
+
+        Returns:
+            SHA of the base branch or None if branch not found
+        """
+        return self.get_branch_sha(repo_full_name, base_branch_name, revalidate=True)
+
+    def _create_ref(self, repo_full_name: str, new_branch_name: str, sha: str, priority: int = INTERACTIVE):
+        """POST a new branch ref pointing at sha"""
+        path = f"/repos/{repo_full_name}/git/refs"
+        data = json.dumps({
+            "ref": f"refs/heads/{new_branch_name}",
+            "sha": sha
+        })
+
+        print(f"Creating branch with: {path}")
+        print(f"Payload: {data}")
+
+        response = self.client.post(path, data=data, operation='create_branch', priority=priority)
+        print(f"Response status: {response.status_code}")
+        return response
+
+    def _error_message(self, response) -> str:
+        try:
+            return response.json().get('message', '')
+        except ValueError:
+            return ''
+
+    def _base_branch_missing(self, repo_full_name: str, new_branch_name: str,
+                             base_branch_name: str) -> Tuple[bool, Dict[str, Any]]:
+        """An existing branch is reported as such even when its base is gone"""
+        if self.check_branch_exists(repo_full_name, new_branch_name):
+            print(f"Branch '{new_branch_name}' already exists.")
+            return True, {"alreadyExists": True}
+
+        print(f"Base branch '{base_branch_name}' not found")
+        return False, {"error": f"Base branch '{base_branch_name}' not found"}
+
+    def create_branch(self, repo_full_name: str, new_branch_name: str, base_branch_name: str = "main",
+                      priority: int = INTERACTIVE, base_sha: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Create a new branch in the repository
 
+        The ref is created optimistically with a single POST, and GitHub's
+        "Reference already exists" error is reported as success with
+        alreadyExists set. If GitHub rejects the base SHA as gone (e.g. after
+        a force push) it is resolved again and the POST retried once.
+
         Args:
             repo_full_name: Full repository name (username/repo)
             new_branch_name: Name of the new branch to create
             base_branch_name: Name of the branch to base the new branch on (default: main)
+            priority: INTERACTIVE or BACKGROUND scheduling priority
+            base_sha: SHA of the base branch if the caller just resolved it
 
         Returns:
-            Tuple of (success, response_data)
+            Tuple of (success, response_data); response_data['alreadyExists']
+            tells whether the branch was already there
         """
         try:
             print(f"Creating branch '{new_branch_name}' in repo '{repo_full_name}' based on '{base_branch_name}'")
 
             # Get the SHA of the base branch
-            base_sha = self.get_branch_sha(repo_full_name, base_branch_name)
+            if not base_sha:
+                base_sha = self.get_base_sha(repo_full_name, base_branch_name)
             print(f"Base branch SHA: {base_sha}")
 
             if not base_sha:
-                print(f"Base branch '{base_branch_name}' not found")
-                return False, {"error": f"Base branch '{base_branch_name}' not found"}
-
-            # Create the new branch - following the pattern from the reference code
-            url = f"https://api.github.com/repos/{repo_full_name}/git/refs"
-            data = json.dumps({
-                "ref": f"refs/heads/{new_branch_name}",
-                "sha": base_sha
-            })
+                return self._base_branch_missing(repo_full_name, new_branch_name, base_branch_name)
 
-            print(f"Creating branch with URL: {url}")
-            print(f"Payload: {data}")
+            # Create the new branch
+            response = self._create_ref(repo_full_name, new_branch_name, base_sha, priority)
 
-            # Use the session directly like in the reference code
-            response = self.session.post(url, data=data)
+            if response.status_code == 422 and self._error_message(response) == "Object does not exist":
+                # The base SHA is gone (e.g. force push), resolve it again
+                print(f"Base SHA {base_sha} is stale, refreshing")
+                base_sha = self.get_base_sha(repo_full_name, base_branch_name)
+                if not base_sha:
+                    return self._base_branch_missing(repo_full_name, new_branch_name, base_branch_name)
+                response = self._create_ref(repo_full_name, new_branch_name, base_sha, priority)
 
-            print(f"Response status: {response.status_code}")
+            if response.status_code == 422 and self._error_message(response) == "Reference already exists":
+                print(f"Branch '{new_branch_name}' already exists.")
+                return True, {"alreadyExists": True}
 
             if response.status_code not in [200, 201]:
                 print(f"POST error: {response.status_code}, {response.text}")
                 return False, {"error": f"Failed to create branch: {response.text}"}
 
+            self.client.invalidate(f"/repos/{repo_full_name}/git/ref/heads/{new_branch_name}")
+            self.client.invalidate(f"/repos/{repo_full_name}/branches/{new_branch_name}")
+
             print(f"✅ Branch '{new_branch_name}' created successfully.")
-            return True, response.json()
+            return True, {**response.json(), "alreadyExists": False}
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
         except Exception as e:
             print(f"Error creating branch: {str(e)}")
             return False, {"error": str(e)}
 
+    def create_branches(self, repo_full_name: str, new_branch_names: List[str],
+                        base_branch_name: str = "main") -> Tuple[bool, Dict[str, Any]]:
+        """
+        Create many branches off the same base branch
+
+        The base SHA is resolved once for the whole call and the refs are
+        then created concurrently, scheduled through the rate limiter.
+
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            new_branch_names: Names of the branches to create
+            base_branch_name: Name of the branch to base the new branches on (default: main)
+
+        Returns:
+            Tuple of (success, response_data); response_data['results'] maps
+            each branch name to the (success, response_data) of create_branch
+        """
+        try:
+            print(f"Creating {len(new_branch_names)} branches in repo '{repo_full_name}' based on '{base_branch_name}'")
+
+            base_sha = self.get_base_sha(repo_full_name, base_branch_name)
+            if not base_sha:
+                print(f"Base branch '{base_branch_name}' not found")
+                return False, {"error": f"Base branch '{base_branch_name}' not found"}
+
+            unique_names = list(dict.fromkeys(new_branch_names))
+            with ThreadPoolExecutor(max_workers=max(1, min(self.bulk_concurrency, len(unique_names)))) as executor:
+                outcomes = executor.map(
+                    lambda name: self.create_branch(repo_full_name, name, base_branch_name, base_sha=base_sha),
+                    unique_names
+                )
+                results = dict(zip(unique_names, outcomes))
+
+            return True, {"baseSha": base_sha, "results": results}
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
+        except Exception as e:
+            print(f"Error creating branches: {str(e)}")
+            return False, {"error": str(e)}
+
     def create_pull_request(self, repo_full_name: str, head: str, base: str, title: str) -> Tuple[bool, Dict[str, Any]]:
         """
         Create a new pull request in the repository
@@ -206,7 +323,7 @@ class GitService:
             print(f"Creating PR from '{head}' into '{base}' in repo '{repo_full_name}'")
 
             # Create the pull request
-            url = f"https://api.github.com/repos/{repo_full_name}/pulls"
+            path = f"/repos/{repo_full_name}/pulls"
             data = json.dumps({
                 "title": title,
                 "head": head,
@@ -214,10 +331,10 @@ class GitService:
                 "body": f"Pull request created via API: {title}"
             })
 
-            print(f"Creating PR with URL: {url}")
+            print(f"Creating PR with: {path}")
             print(f"Payload: {data}")
 
-            response = self.session.post(url, data=data)
+            response = self.client.post(path, data=data, operation='create_pull_request')
 
             print(f"Response status: {response.status_code}")
 
@@ -227,41 +344,108 @@ class GitService:
 
             print(f"✅ Pull request '{title}' created successfully.")
             return True, response.json()
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
         except Exception as e:
             print(f"Error creating PR: {str(e)}")
             return False, {"error": str(e)}
 
-    def get_pull_request_diff(self, repo_full_name: str, pr_number: int) -> Tuple[bool, str]:
+    def get_pull_request(self, repo_full_name: str, pr_number: int) -> Tuple[bool, Dict[str, Any]]:
         """
-        Get the diff for a pull request
+        Get a pull request's details, e.g. its current head commit
 
         Args:
             repo_full_name: Full repository name (username/repo)
             pr_number: The pull request number
 
         Returns:
-            Tuple of (success, diff_content)
+            Tuple of (success, response_data)
         """
         try:
-            print(f"Getting diff for PR #{pr_number} in repo '{repo_full_name}'")
+            path = f"/repos/{repo_full_name}/pulls/{pr_number}"
+            response = self.client.get_cached(path, operation='get_pull_request')
 
-            # Get the diff
-            url = f"https://api.github.com/repos/{repo_full_name}/pulls/{pr_number}"
-            headers = self.session.headers.copy()
-            headers.update({"Accept": "application/vnd.github.v3.diff"})
+            if response.status_code != 200:
+                print(f"GET error: {response.status_code}, {response.text}")
+                return False, {"error": f"Failed to get PR: {response.text}"}
 
-            print(f"Getting diff with URL: {url}")
+            return True, response.json()
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
+        except Exception as e:
+            print(f"Error getting PR: {str(e)}")
+            return False, {"error": str(e)}
 
-            response = requests.get(url, headers=headers, auth=self.session.auth)
+    def open_pull_request_diff(self, repo_full_name: str, pr_number: int,
+                               priority: int = INTERACTIVE) -> Tuple[bool, Any]:
+        """
+        Start downloading the diff for a pull request without reading the body
 
-            print(f"Response status: {response.status_code}")
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            pr_number: The pull request number
+            priority: Rate limiter priority (INTERACTIVE or BACKGROUND)
 
-            if response.status_code != 200:
-                print(f"GET error: {response.status_code}, {response.text}")
-                return False, f"Failed to get PR diff: {response.text}"
+        Returns:
+            Tuple of (success, response or error data). The caller reads the
+            body with response.iter_content() and must close the response.
+        """
+        try:
+            print(f"Streaming diff for PR #{pr_number} in repo '{repo_full_name}'")
 
-            print(f"✅ Pull request diff retrieved successfully.")
-            return True, response.text
+            path = f"/repos/{repo_full_name}/pulls/{pr_number}"
+            headers = {"Accept": "application/vnd.github.v3.diff"}
+            response = self.client.get(path, headers=headers, operation='stream_pull_request_diff',
+                                       priority=priority, stream=True)
+
+            if response.status_code != 200:
+                error = response.text
+                response.close()
+                print(f"GET error: {response.status_code}, {error}")
+                return False, {"error": f"Failed to get PR diff: {error}", "statusCode": response.status_code}
+
+            return True, response
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
         except Exception as e:
             print(f"Error getting PR diff: {str(e)}")
-            return False, str(e)
+            return False, {"error": str(e)}
+
+    def open_commit_diff(self, repo_full_name: str, base: str, head_sha: str,
+                         priority: int = INTERACTIVE) -> Tuple[bool, Any]:
+        """
+        Start downloading the diff of head_sha against base without reading the body
+
+        This is the compare view (base...head_sha, from their merge base), which
+        is what GitHub shows as a PR's diff, but pinned to one head commit, so
+        a push while it downloads does not change it.
+
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            base: Base branch (or commit) of the pull request
+            head_sha: Head commit to get the diff of
+            priority: Rate limiter priority (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            Tuple of (success, response or error data). The caller reads the
+            body with response.iter_content() and must close the response.
+        """
+        try:
+            path = f"/repos/{repo_full_name}/compare/{base}...{head_sha}"
+            headers = {"Accept": "application/vnd.github.v3.diff"}
+            response = self.client.get(path, headers=headers, operation='stream_commit_diff',
+                                       priority=priority, stream=True)
+
+            if response.status_code != 200:
+                error = response.text
+                response.close()
+                print(f"GET error: {response.status_code}, {error}")
+                return False, {"error": f"Failed to get diff of {head_sha[:7]}: {error}",
+                               "statusCode": response.status_code}
+
+            return True, response
+        except GitHubRateLimitError as e:
+            return False, self._rate_limited(e)
+        except Exception as e:
+            print(f"Error getting commit diff: {str(e)}")
+            return False, {"error": str(e)}
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from services.github_rate_limiter import INTERACTIVE, github_rate_limiter
+from utils import metrics
+from utils.ttl_cache import TTLCache
+
+
+class GitHubRetry(Retry):
+    """
+    Retry policy for GitHub API calls.
+
+    Besides the usual 5xx retries for idempotent methods, requests rejected
+    by GitHub's secondary rate limit (403/429 with Retry-After) are retried
+    for any method, since GitHub did not process them. The Retry-After wait
+    is capped so a request thread is never parked for minutes.
+    """
+
+    retry_after_cap = 10.0  # seconds
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code in (403, 429) and has_retry_after:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.retry_after_cap)
+
+
+class CachedResponse:
+    """Response served from the GitHub read cache, with the same attributes GitService reads."""
+
+    def __init__(self, status_code: int, text: str, etag: Optional[str] = None):
+        self.status_code = status_code
+        self.text = text
+        self.etag = etag
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class GitHubClient:
+    """
+    Shared HTTP transport for the GitHub REST API.
+
+    One pooled keep-alive session is used for every call, each call gets a
+    timeout and retry policy, and per-operation latency is recorded. Calls
+    are scheduled through the shared rate limiter for the client's token.
+    """
+
+    def __init__(self, token: str, user: str = "github-user", base_url: Optional[str] = None):
+        self.base_url = (base_url or os.getenv('GITHUB_API_URL', 'https://api.github.com')).rstrip('/')
+        self.timeout = (
+            float(os.getenv('GITHUB_CONNECT_TIMEOUT', '3.05')),
+            float(os.getenv('GITHUB_READ_TIMEOUT', '20'))
+        )
+        self.logger = logging.getLogger(__name__)
+        self.rate_limiter = github_rate_limiter
+        self.token_key = github_rate_limiter.token_key(token)
+
+        retry = GitHubRetry(
+            total=int(os.getenv('GITHUB_MAX_RETRIES', '3')),
+            backoff_factor=float(os.getenv('GITHUB_RETRY_BACKOFF', '0.5')),
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=int(os.getenv('GITHUB_POOL_CONNECTIONS', '4')),
+            pool_maxsize=int(os.getenv('GITHUB_POOL_MAXSIZE', '32')),
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Use basic auth with token as password
+        self.session.auth = (user, token)
+        self.session.headers.update({
+            'Accept': 'application/vnd.github.v3+json',
+            'Connection': 'keep-alive'
+        })
+
+        # Validators for conditional requests (304s are free against the rate
+        # limit), plus a short TTL layer that skips the network entirely
+        self.etag_cache = TTLCache(
+            max_size=int(os.getenv('GITHUB_ETAG_CACHE_SIZE', '2048')),
+            ttl=float(os.getenv('GITHUB_ETAG_CACHE_TTL', '3600'))
+        )
+        self.response_cache = TTLCache(
+            max_size=int(os.getenv('GITHUB_ETAG_CACHE_SIZE', '2048')),
+            ttl=float(os.getenv('GITHUB_CACHE_TTL', '10'))
+        )
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, operation: Optional[str] = None,
+                priority: int = INTERACTIVE, **kwargs) -> requests.Response:
+        """
+        Send a request to the GitHub API.
+
+        Args:
+            method: HTTP method
+            path: API path, e.g. /repos/{owner}/{repo}/pulls
+            operation: Name the call's latency is recorded under (default: method)
+            priority: INTERACTIVE or BACKGROUND scheduling priority
+            **kwargs: Passed through to requests (headers, data, stream, ...)
+
+        Returns:
+            The response; retries have already been applied
+
+        Raises:
+            GitHubRateLimitError: if the call could not be scheduled within the rate limit
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        operation = operation or method.upper()
+
+        self.rate_limiter.acquire(self.token_key, priority)
+        start_time = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+            return response
+        finally:
+            if response is None:
+                self.rate_limiter.release(self.token_key)
+            else:
+                self.rate_limiter.release(self.token_key, response.status_code, response.headers)
+            failed = response is None or response.status_code >= 500
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self._record(operation, elapsed_ms, failed)
+            metrics.observe('github', operation, elapsed_ms / 1000, 'error' if failed else 'ok')
+            self.logger.debug(f"GitHub {method.upper()} {path} [{operation}] took {elapsed_ms:.1f}ms")
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def get_cached(self, path: str, operation: Optional[str] = None, priority: int = INTERACTIVE,
+                   headers: Optional[Dict[str, str]] = None, revalidate: bool = False) -> CachedResponse:
+        """
+        GET a resource through the read cache.
+
+        Fresh entries are served from memory. Otherwise the request is sent
+        with If-None-Match when a validator is known, and a 304 reuses the
+        stored body. Only 200 and 404 responses are cached.
+
+        Args:
+            path: API path
+            operation: Name the call is recorded under
+            priority: INTERACTIVE or BACKGROUND scheduling priority
+            headers: Extra request headers (part of the cache key)
+            revalidate: Always ask GitHub, conditionally when a validator is known
+
+        Returns:
+            A CachedResponse with status_code, text and json()
+        """
+        operation = operation or 'GET'
+        headers = dict(headers or {})
+        key = (path, headers.get('Accept'))
+
+        cached = None if revalidate else self.response_cache.get(key)
+        if cached is not None:
+            self._count(operation, 'cacheHits')
+            return cached
+
+        validator = self.etag_cache.get(key)
+        if validator is not None:
+            headers['If-None-Match'] = validator.etag
+
+        response = self.request('GET', path, operation=operation, priority=priority, headers=headers)
+
+        if response.status_code == 304 and validator is not None:
+            self._count(operation, 'notModified')
+            self.response_cache.set(key, validator)
+            return validator
+
+        result = CachedResponse(response.status_code, response.text, response.headers.get('ETag'))
+        if response.status_code == 200:
+            if result.etag:
+                self.etag_cache.set(key, result)
+            self.response_cache.set(key, result)
+        elif response.status_code == 404:
+            self.etag_cache.delete(key)
+            self.response_cache.set(key, result)
+        return result
+
+    def invalidate(self, path: str, accept: Optional[str] = None):
+        """Drop cached reads of path, e.g. after writing to it."""
+        self.response_cache.delete((path, accept))
+        self.etag_cache.delete((path, accept))
+
+    def _record(self, operation: str, elapsed_ms: float, failed: bool):
+        with self._stats_lock:
+            stats = self._stats_for(operation)
+            stats['count'] += 1
+            stats['errors'] += int(failed)
+            stats['totalMs'] += elapsed_ms
+            stats['maxMs'] = max(stats['maxMs'], elapsed_ms)
+
+    def _count(self, operation: str, counter: str):
+        with self._stats_lock:
+            self._stats_for(operation)[counter] += 1
+
+    def _stats_for(self, operation: str) -> Dict[str, float]:
+        return self._stats.setdefault(operation, {
+            'count': 0,
+            'errors': 0,
+            'totalMs': 0.0,
+            'maxMs': 0.0,
+            'cacheHits': 0,
+            'notModified': 0
+        })
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-operation call count, error count, latency (ms) and cache hits since startup."""
+        with self._stats_lock:
+            return {
+                operation: {
+                    **stats,
+                    'avgMs': stats['totalMs'] / stats['count'] if stats['count'] else 0.0
+                }
+                for operation, stats in self._stats.items()
+            }
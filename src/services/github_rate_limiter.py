@@ -0,0 +1,194 @@
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Request priorities; lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    INTERACTIVE: 'interactive',
+    BACKGROUND: 'background',
+}
+
+
+class GitHubRateLimitError(Exception):
+    """Raised when a request cannot be scheduled within its maximum wait."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenQuota:
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None       # epoch seconds
+        self.blocked_until = 0.0   # epoch seconds, from Retry-After / secondary limits
+        self.in_flight = 0
+        self.last_background_at = 0.0
+        self.updated_at = None
+        self.waiters = []          # heap of (priority, sequence)
+
+    def to_dict(self) -> Dict:
+        """Convert the quota state to a dictionary."""
+        def iso(timestamp):
+            if not timestamp:
+                return None
+            return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _ in self.waiters:
+            queued[PRIORITY_NAMES[priority]] += 1
+
+        return {
+            'limit': self.limit,
+            'remaining': self.remaining,
+            'resetAt': iso(self.reset_at),
+            'blockedUntil': iso(self.blocked_until if self.blocked_until > time.time() else None),
+            'inFlight': self.in_flight,
+            'queued': queued,
+            'updatedAt': iso(self.updated_at)
+        }
+
+
+class GitHubRateLimiter:
+    """
+    Schedules GitHub API calls against each token's rate limit.
+
+    Quota is tracked from the X-RateLimit-* and Retry-After response headers.
+    Callers wait in a per-token priority queue: interactive calls are always
+    served before background ones and may use the whole quota, while
+    background calls keep a reserve free for interactive users and are paced
+    evenly over the time left until the quota resets. In-flight calls per
+    token are capped to stay clear of GitHub's secondary (concurrency) limits.
+    """
+
+    def __init__(self):
+        self.max_concurrent = int(os.getenv('GITHUB_MAX_CONCURRENT_REQUESTS', '8'))
+        self.background_reserve = int(os.getenv('GITHUB_BACKGROUND_RESERVE', '500'))
+        self.max_wait = {
+            INTERACTIVE: float(os.getenv('GITHUB_INTERACTIVE_MAX_WAIT', '30')),
+            BACKGROUND: float(os.getenv('GITHUB_BACKGROUND_MAX_WAIT', '600')),
+        }
+        self._quotas = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Identify a token in logs and quota state without exposing it."""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()[:12]
+
+    def acquire(self, token_key: str, priority: int = INTERACTIVE):
+        """
+        Wait until a request may be sent with the given token.
+
+        Every successful acquire must be paired with release().
+
+        Raises:
+            GitHubRateLimitError: if the request could not be scheduled within its maximum wait
+        """
+        deadline = time.time() + self.max_wait[priority]
+        with self._condition:
+            quota = self._quotas.setdefault(token_key, TokenQuota())
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(quota.waiters, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    wait = self._wait_time(quota, ticket, now)
+                    if wait == 0:
+                        break
+                    if now >= deadline:
+                        retry_after = None if wait is None else wait
+                        raise GitHubRateLimitError("GitHub rate limit reached, please retry later", retry_after)
+                    timeout = deadline - now if wait is None else min(wait, deadline - now)
+                    self._condition.wait(timeout)
+            finally:
+                quota.waiters.remove(ticket)
+                heapq.heapify(quota.waiters)
+                self._condition.notify_all()
+
+            quota.in_flight += 1
+            if quota.remaining is not None:
+                quota.remaining = max(0, quota.remaining - 1)
+            if priority == BACKGROUND:
+                quota.last_background_at = time.time()
+
+    def release(self, token_key: str, status_code: Optional[int] = None, headers=None):
+        """Finish a request, updating the token's quota from the response headers."""
+        with self._condition:
+            quota = self._quotas.setdefault(token_key, TokenQuota())
+            quota.in_flight = max(0, quota.in_flight - 1)
+            if headers is not None:
+                self._update_quota(quota, status_code, headers)
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current quota state per token."""
+        with self._condition:
+            return {key: quota.to_dict() for key, quota in self._quotas.items()}
+
+    def _wait_time(self, quota: TokenQuota, ticket, now: float) -> Optional[float]:
+        """
+        Seconds until ticket may proceed: 0 to go now, None to wait for
+        another request to finish or leave the queue.
+        """
+        if quota.waiters[0] != ticket:
+            return None
+        if quota.blocked_until > now:
+            return quota.blocked_until - now
+        if quota.in_flight >= self.max_concurrent:
+            return None
+
+        priority = ticket[0]
+        if quota.remaining is None or quota.reset_at is None or quota.reset_at <= now:
+            return 0
+
+        reserve = self.background_reserve if priority == BACKGROUND else 0
+        available = quota.remaining - reserve
+        if available <= 0:
+            return quota.reset_at - now
+
+        if priority == BACKGROUND:
+            # Spread background calls evenly over the rest of the window
+            interval = (quota.reset_at - now) / available
+            next_slot = quota.last_background_at + interval
+            if next_slot > now:
+                return next_slot - now
+
+        return 0
+
+    def _update_quota(self, quota: TokenQuota, status_code: Optional[int], headers):
+        now = time.time()
+        try:
+            if 'X-RateLimit-Limit' in headers:
+                quota.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                quota.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                quota.reset_at = float(headers['X-RateLimit-Reset'])
+        except ValueError:
+            pass
+        quota.updated_at = now
+
+        if status_code in (403, 429):
+            retry_after = headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    quota.blocked_until = max(quota.blocked_until, now + float(retry_after))
+                except ValueError:
+                    pass
+            elif quota.remaining == 0 and quota.reset_at:
+                quota.blocked_until = max(quota.blocked_until, quota.reset_at)
+
+
+# Shared across every GitHub client in the process
+github_rate_limiter = GitHubRateLimiter()
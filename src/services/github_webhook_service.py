@@ -0,0 +1,273 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from urllib.parse import urlparse
+import hashlib
+import hmac
+import os
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+from models.github_event import GitHubEvent
+
+load_dotenv()
+
+# Events that change subtask status; anything else is logged and acknowledged
+HANDLED_EVENTS = ('push', 'create', 'pull_request')
+
+# pull_request actions after which the PR is open on GitHub
+OPEN_PR_ACTIONS = ('opened', 'reopened', 'ready_for_review', 'synchronize')
+
+
+class GitHubWebhookService:
+    """
+    Ingests GitHub webhook deliveries into an event log and applies them to
+    subtask instances, so branch and PR status is pushed to us instead of
+    polled from the GitHub API.
+
+    Deliveries are keyed by GitHub's delivery ID, so redeliveries are not
+    applied twice. Applying an event only ever sets flags, which makes it
+    safe to replay the log.
+
+    An event is matched to problem instances through the repository and the
+    create-branch naming convention {gitUsername}-{branchOff}: an event on
+    branch "johndoe-main" of "org/repo" updates the unfinished subtasks of
+    the instances whose gitUsername is "johndoe" and whose problem's
+    metadata.gitRepo is the org/repo repository. When several usernames
+    match (e.g. "john" and "john-doe" for "john-doe-main"), the longest wins.
+    """
+
+    def __init__(self, git_service=None, pr_diff_service=None):
+        self.secret = os.getenv('GITHUB_WEBHOOK_SECRET')
+        self.git_service = git_service
+        self.pr_diff_service = pr_diff_service
+        self.client = MongoClient(os.getenv('MONGODB_URI'))
+        self.db = self.client[os.getenv('MONGODB_DB')]
+        self.collection = self.db.github_events
+        self.subtasks = self.db.subtask_instances
+        self.problem_instances = self.db.problem_instances
+        self.problems = self.db.problems
+        self._indexes_created = False
+
+    def verify_signature(self, body: bytes, signature_header: Optional[str]) -> bool:
+        """
+        Check the X-Hub-Signature-256 header against the configured webhook secret.
+
+        Args:
+            body: The raw request body
+            signature_header: Value of the X-Hub-Signature-256 header
+
+        Returns:
+            True if the body was signed with the secret
+        """
+        if not self.secret or not signature_header or not signature_header.startswith('sha256='):
+            return False
+        expected = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature_header[len('sha256='):])
+
+    def ingest(self, delivery_id: str, event: str, payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Record a webhook delivery and apply it.
+
+        Args:
+            delivery_id: Value of the X-GitHub-Delivery header
+            event: Value of the X-GitHub-Event header
+            payload: The parsed event payload
+
+        Returns:
+            Tuple of (result, error_message). The result has 'duplicate': True
+            if this delivery was already applied.
+        """
+        try:
+            self._ensure_indexes()
+            github_event = GitHubEvent(
+                delivery_id=delivery_id,
+                event=event,
+                payload=payload,
+                action=payload.get('action'),
+                repo_full_name=(payload.get('repository') or {}).get('full_name'),
+                branch=self._event_branch(event, payload),
+                sender=(payload.get('sender') or {}).get('login')
+            )
+
+            try:
+                self.collection.insert_one(github_event.to_dict())
+            except DuplicateKeyError:
+                existing = self.collection.find_one({'_id': delivery_id})
+                if existing and existing.get('processedAt'):
+                    return {**(existing.get('result') or {}), 'duplicate': True}, None
+
+            result = self._apply(github_event)
+            return {**result, 'duplicate': False}, None
+        except Exception as e:
+            print(f"Error ingesting GitHub event {delivery_id}: {str(e)}")
+            return None, str(e)
+
+    def replay_events(self, since: Optional[str] = None, event_types: Optional[List[str]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Apply logged events again, oldest first.
+
+        Args:
+            since: Only replay events received at or after this ISO timestamp
+            event_types: Only replay these event types (default: all handled events)
+
+        Returns:
+            Tuple of (summary, error_message)
+        """
+        try:
+            query = {'event': {'$in': list(event_types or HANDLED_EVENTS)}}
+            if since:
+                query['receivedAt'] = {'$gte': since}
+
+            replayed = 0
+            modified = 0
+            failed = 0
+            for data in self.collection.find(query).sort('receivedAt', ASCENDING):
+                result = self._apply(GitHubEvent.from_dict(data), refresh_caches=False)
+                replayed += 1
+                modified += result.get('modified', 0)
+                failed += int('error' in result)
+
+            return {'replayed': replayed, 'modified': modified, 'failed': failed}, None
+        except Exception as e:
+            return None, str(e)
+
+    def get_events(self, limit: int = 50, event: Optional[str] = None, repo_full_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the most recent logged events, without payloads.
+
+        Args:
+            limit: Maximum number of events
+            event: Only return this event type
+            repo_full_name: Only return events of this repository
+
+        Returns:
+            List of events, newest first
+        """
+        query = {}
+        if event:
+            query['event'] = event
+        if repo_full_name:
+            query['repoFullName'] = repo_full_name
+
+        cursor = self.collection.find(query, {'payload': 0}).sort('receivedAt', -1).limit(limit)
+        return [GitHubEvent.from_dict(data).to_dict() for data in cursor]
+
+    def _ensure_indexes(self):
+        if not self._indexes_created:
+            self.collection.create_index([('receivedAt', ASCENDING)])
+            self.subtasks.create_index([('problemInstanceId', ASCENDING)])
+            self.problem_instances.create_index([('gitUsername', ASCENDING)])
+            self._indexes_created = True
+
+    @staticmethod
+    def _event_branch(event: str, payload: Dict[str, Any]) -> Optional[str]:
+        if event == 'push':
+            ref = payload.get('ref') or ''
+            return ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else None
+        if event == 'create':
+            return payload.get('ref') if payload.get('ref_type') == 'branch' else None
+        if event == 'pull_request':
+            return ((payload.get('pull_request') or {}).get('head') or {}).get('ref')
+        return None
+
+    def _apply(self, github_event: GitHubEvent, refresh_caches: bool = True) -> Dict[str, Any]:
+        """Update subtask flags for one event and record the outcome on the logged event."""
+        try:
+            updates = self._flag_updates(github_event)
+            result = {'matched': 0, 'modified': 0}
+            if updates and github_event.branch and github_event.repo_full_name:
+                instance_ids = self._matching_instance_ids(github_event.repo_full_name, github_event.branch)
+                if instance_ids:
+                    update_result = self.subtasks.update_many(
+                        {'problemInstanceId': {'$in': instance_ids}, 'status': {'$ne': 'completed'}},
+                        {'$set': updates}
+                    )
+                    result = {'matched': update_result.matched_count, 'modified': update_result.modified_count}
+
+            if refresh_caches:
+                self._refresh_caches(github_event)
+        except Exception as e:
+            print(f"Error applying GitHub event {github_event.delivery_id}: {str(e)}")
+            result = {'error': str(e)}
+
+        self.collection.update_one({'_id': github_event.delivery_id}, {'$set': {
+            'processedAt': datetime.now().isoformat(),
+            'result': result,
+            'error': result.get('error')
+        }})
+        return result
+
+    @staticmethod
+    def _flag_updates(github_event: GitHubEvent) -> Dict[str, bool]:
+        payload = github_event.payload
+        if github_event.event == 'create' and payload.get('ref_type') == 'branch':
+            return {'branchCreated': True}
+        if github_event.event == 'push' and not payload.get('deleted'):
+            return {'branchCreated': True}
+        if github_event.event == 'pull_request' and github_event.action in OPEN_PR_ACTIONS:
+            return {'branchCreated': True, 'prCreated': True}
+        return {}
+
+    @staticmethod
+    def _branch_usernames(branch: str) -> List[str]:
+        # Usernames may contain '-', so every prefix before a '-' is a candidate
+        parts = branch.split('-')
+        return ['-'.join(parts[:i]) for i in range(1, len(parts))]
+
+    @staticmethod
+    def _repo_full_name(repo_url: Optional[str]) -> Optional[str]:
+        """'owner/repo' (lowercase) for a GitHub repository URL, or None."""
+        if not repo_url:
+            return None
+        parsed_url = urlparse(repo_url)
+        if 'github.com' not in parsed_url.netloc:
+            return None
+        parts = parsed_url.path.strip('/').split('/')
+        if len(parts) < 2:
+            return None
+        repo_name = parts[1][:-len('.git')] if parts[1].endswith('.git') else parts[1]
+        return f"{parts[0]}/{repo_name}".lower()
+
+    def _matching_instance_ids(self, repo_full_name: str, branch: str) -> List[str]:
+        """
+        IDs of the problem instances a branch of repo_full_name belongs to: the
+        branch starts with the instance's gitUsername and the instance's
+        problem lives in that repository.
+        """
+        instances = list(self.problem_instances.find(
+            {'gitUsername': {'$in': self._branch_usernames(branch)}},
+            {'problemNum': 1, 'gitUsername': 1}
+        ))
+        if not instances:
+            return []
+
+        problem_nums = list({instance.get('problemNum') for instance in instances})
+        repo_full_name = repo_full_name.lower()
+        problems_in_repo = {
+            problem['problem_num']
+            for problem in self.problems.find({'problem_num': {'$in': problem_nums}},
+                                              {'problem_num': 1, 'metadata.gitRepo': 1})
+            if self._repo_full_name((problem.get('metadata') or {}).get('gitRepo')) == repo_full_name
+        }
+        instances = [instance for instance in instances if instance.get('problemNum') in problems_in_repo]
+        if not instances:
+            return []
+
+        username = max((instance['gitUsername'] for instance in instances), key=len)
+        return [str(instance['_id']) for instance in instances if instance['gitUsername'] == username]
+
+    def _refresh_caches(self, github_event: GitHubEvent):
+        """Drop cached GitHub reads the event made stale and prefetch new PR diffs."""
+        repo_full_name = github_event.repo_full_name
+        if not repo_full_name or not github_event.branch:
+            return
+
+        if self.git_service is not None and github_event.event in ('push', 'create'):
+            self.git_service.client.invalidate(f"/repos/{repo_full_name}/git/ref/heads/{github_event.branch}")
+            self.git_service.client.invalidate(f"/repos/{repo_full_name}/branches/{github_event.branch}")
+
+        if self.pr_diff_service is not None and github_event.event == 'pull_request' \
+                and github_event.action in OPEN_PR_ACTIONS:
+            pull_request = github_event.payload.get('pull_request') or {}
+            self.pr_diff_service.schedule_fetch(
+                repo_full_name, pull_request.get('number'), (pull_request.get('head') or {}).get('sha'))
@@ -1,4 +1,4 @@
-from flask import current_app
+from flask import current_app, has_app_context
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
@@ -14,11 +14,16 @@ class MongoService:
         self.user_activity = None
         self.logger = logging.getLogger(__name__)
 
-    def initialize(self):
-        """Initialize the MongoDB client and set up collections."""
+    def initialize(self, run_checks=False):
+        """
+        Create the MongoDB client and collection handles.
+
+        This does no I/O (the client connects on first use) unless run_checks
+        is set, in which case check() verifies the database as well.
+        """
         try:
             # Try to get MongoDB URI from Flask config first
-            mongo_uri = current_app.config.get("MONGO_URI")
+            mongo_uri = current_app.config.get("MONGO_URI") if has_app_context() else None
             self.logger.info(f"MongoDB URI from config: {mongo_uri}")
 
             # If not available, fall back to environment variable
@@ -27,7 +32,7 @@ class MongoService:
                 self.logger.warning(f"Using fallback MongoDB URI from environment: {mongo_uri}")
 
             # Get database name
-            db_name = current_app.config.get("MONGO_DB_NAME") or os.getenv("MONGODB_DB", "pangea")
+            db_name = (current_app.config.get("MONGO_DB_NAME") if has_app_context() else None) or os.getenv("MONGODB_DB", "pangea")
             self.logger.info(f"Using database name: {db_name}")
 
             # Connect to MongoDB
@@ -36,41 +41,50 @@ class MongoService:
             self.db = self.client[db_name]
 
             # Set up collections
-            self.logger.info("Setting up user_activity collection")
             self.user_activity = self.db["user_activity"]
 
-            # List all collections to verify
-            collection_names = self.db.list_collection_names()
-            self.logger.info(f"Available collections: {collection_names}")
-
-            # Check if user_activity exists
-            if "user_activity" not in collection_names:
-                self.logger.info("Creating user_activity collection")
-                self.db.create_collection("user_activity")
-
-            # Verify user_activity is accessible
-            self.logger.info(f"Verifying user_activity collection: {self.user_activity is not None}")
-
-            # Insert a test document to verify write access
-            test_result = self.user_activity.insert_one({"test": True, "timestamp": datetime.now(timezone.utc)})
-            self.logger.info(f"Test document inserted with ID: {test_result.inserted_id}")
-
-            # Delete the test document
-            self.user_activity.delete_one({"_id": test_result.inserted_id})
-            self.logger.info("Test document deleted")
+            if run_checks:
+                self.check()
 
             self.logger.info(f"MongoDB initialized successfully with database: {db_name}")
 
-            # Test connection
-            ping_result = self.db.command('ping')
-            self.logger.info(f"MongoDB connection test result: {ping_result}")
-
         except Exception as e:
             self.logger.error(f"Failed to initialize MongoDB: {str(e)}")
             import traceback
             self.logger.error(traceback.format_exc())
             # Don't raise the exception - let the application continue but log the error
 
+    def check(self):
+        """Verify the database is reachable and writable, creating missing collections."""
+        # List all collections to verify
+        collection_names = self.db.list_collection_names()
+        self.logger.info(f"Available collections: {collection_names}")
+
+        # Check if user_activity exists
+        if "user_activity" not in collection_names:
+            self.logger.info("Creating user_activity collection")
+            self.db.create_collection("user_activity")
+
+        # Insert a test document to verify write access
+        test_result = self.user_activity.insert_one({"test": True, "timestamp": datetime.now(timezone.utc)})
+        self.logger.info(f"Test document inserted with ID: {test_result.inserted_id}")
+
+        # Delete the test document
+        self.user_activity.delete_one({"_id": test_result.inserted_id})
+        self.logger.info("Test document deleted")
+
+        # Test connection
+        ping_result = self.db.command('ping')
+        self.logger.info(f"MongoDB connection test result: {ping_result}")
+
+    def close(self):
+        """Close the client and drop the collection handles; initialize() creates them again."""
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+        self.user_activity = None
+
     def get_db(self):
         """Get the database instance."""
         if self.db is None:
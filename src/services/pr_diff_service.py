@@ -0,0 +1,389 @@
+from typing import Iterable, Iterator, List, Optional, Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import os
+import threading
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+from models.pr_diff import PRDiff
+from services.diff_store import DiffBlobStore
+from services.github_rate_limiter import BACKGROUND
+
+load_dotenv()
+
+
+def iter_split_diff(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Split a streamed unified git diff into one entry per file, yielding each
+    file as soon as it is complete.
+
+    Args:
+        lines: Lines of the diff, as returned by GitHub's diff media type
+
+    Returns:
+        Iterator of dicts with path, oldPath, changeType, additions, deletions and diff
+    """
+    current = None
+    # The file's diff lines, joined once when the file is complete
+    diff_lines = []
+    in_header = False
+
+    for line in lines:
+        if line.startswith('diff --git '):
+            if current is not None:
+                current['diff'] = ''.join(diff_lines)
+                yield current
+            current = _new_file_entry(line)
+            diff_lines = []
+            in_header = True
+        elif current is None:
+            continue
+        elif in_header and _parse_header_line(current, line):
+            pass
+        elif line.startswith('@@'):
+            in_header = False
+        elif not in_header and line.startswith('+'):
+            current['additions'] += 1
+        elif not in_header and line.startswith('-'):
+            current['deletions'] += 1
+
+        if current is not None:
+            diff_lines.append(line)
+
+    if current is not None:
+        current['diff'] = ''.join(diff_lines)
+        yield current
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Re-split a stream of byte chunks into lines, keeping the line endings."""
+    # Pieces of a line that spans several chunks are joined once it ends, so
+    # a very long line costs linear rather than quadratic time
+    pending = []
+    for chunk in chunks:
+        lines = chunk.split(b'\n')
+        if len(lines) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(lines[0])
+        yield b''.join(pending) + b'\n'
+        for line in lines[1:-1]:
+            yield line + b'\n'
+        pending = [lines[-1]]
+    rest = b''.join(pending)
+    if rest:
+        yield rest
+
+
+def filter_diff(lines: Iterable[bytes], paths: Iterable[str]) -> Iterator[bytes]:
+    """
+    Pass through only the parts of a streamed diff that belong to the given
+    files (matched on the new or old path).
+
+    Only the header of the current file is held back until its paths are
+    known, so memory use does not depend on the size of the diff.
+    """
+    paths = set(paths)
+    entry = None
+    header = []
+    include = False
+
+    for line in lines:
+        if line.startswith(b'diff --git '):
+            # A file without hunks (rename, mode change, binary) ends at the next header
+            if header and _matches(entry, paths):
+                yield from header
+            entry = _new_file_entry(line.decode('utf-8', 'replace'))
+            header = [line]
+            include = False
+        elif header:
+            if line.startswith(b'@@'):
+                include = _matches(entry, paths)
+                if include:
+                    yield from header
+                    yield line
+                header = []
+            else:
+                _parse_header_line(entry, line.decode('utf-8', 'replace'))
+                header.append(line)
+        elif include:
+            yield line
+
+    if header and _matches(entry, paths):
+        yield from header
+
+
+def rechunk(chunks: Iterable[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Group small chunks (e.g. single lines) into writes of about chunk_size bytes."""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _matches(entry: Dict[str, Any], paths: set) -> bool:
+    return entry['path'] in paths or entry['oldPath'] in paths
+
+
+def _parse_header_line(entry: Dict[str, Any], line: str) -> bool:
+    """Update entry from a file header line; returns False if line is not one of the parsed headers."""
+    if line.startswith('--- '):
+        old_path = _strip_prefix(line[4:].rstrip('\n'), 'a/')
+        if old_path is None:
+            entry['changeType'] = 'added'
+        else:
+            entry['oldPath'] = old_path
+    elif line.startswith('+++ '):
+        new_path = _strip_prefix(line[4:].rstrip('\n'), 'b/')
+        if new_path is None:
+            entry['changeType'] = 'deleted'
+        else:
+            entry['path'] = new_path
+    elif line.startswith('new file mode'):
+        entry['changeType'] = 'added'
+    elif line.startswith('deleted file mode'):
+        entry['changeType'] = 'deleted'
+    elif line.startswith('rename from '):
+        entry['oldPath'] = line[len('rename from '):].rstrip('\n')
+        entry['changeType'] = 'renamed'
+    elif line.startswith('rename to '):
+        entry['path'] = line[len('rename to '):].rstrip('\n')
+        entry['changeType'] = 'renamed'
+    else:
+        return False
+    return True
+
+
+def _new_file_entry(header_line: str) -> Dict[str, Any]:
+    # "diff --git a/<old> b/<new>"; reliable for paths without spaces, and
+    # overridden by the ---/+++ and rename lines when present
+    paths = header_line[len('diff --git '):].rstrip('\n')
+    old_path, _, new_path = paths.partition(' b/')
+    old_path = old_path[2:] if old_path.startswith('a/') else old_path
+    return {
+        'path': new_path or old_path,
+        'oldPath': old_path,
+        'changeType': 'modified',
+        'additions': 0,
+        'deletions': 0,
+        'diff': ''
+    }
+
+
+def _strip_prefix(path: str, prefix: str) -> Optional[str]:
+    if path == '/dev/null':
+        return None
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+class PRDiffService:
+    """
+    Fetches pull request diffs from GitHub in the background and stores
+    them, so PR creation does not wait on the diff download and readers can
+    page through large diffs without going back to GitHub.
+
+    A diff is stored once per (repo, PR, head SHA). The text of each file's
+    diff is kept in the content-addressed DiffBlobStore, so identical file
+    diffs across PRs and pushes share one compressed copy.
+    """
+
+    def __init__(self, git_service):
+        self.git_service = git_service
+        self.client = MongoClient(os.getenv('MONGODB_URI'))
+        self.db = self.client[os.getenv('MONGODB_DB')]
+        self.collection = self.db.pr_diffs
+        self.blobs = DiffBlobStore(self.db)
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('PR_DIFF_WORKERS', '2')),
+            thread_name_prefix='pr-diff'
+        )
+        # A fetch still pending after this long is assumed lost (e.g. the
+        # process restarted) and is started again
+        self.pending_timeout = float(os.getenv('PR_DIFF_PENDING_TIMEOUT', '600'))
+        self._indexes_created = False
+        self._indexes_lock = threading.Lock()
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        with self._indexes_lock:
+            if not self._indexes_created:
+                # Diffs used to be stored once per PR; that unique index would
+                # reject the diff of any later head commit of the same PR
+                for name, index in self.collection.index_information().items():
+                    if index.get('unique') and index['key'] == [('repoFullName', ASCENDING), ('prNumber', ASCENDING)]:
+                        self.collection.drop_index(name)
+                self.collection.create_index(
+                    [('repoFullName', ASCENDING), ('prNumber', ASCENDING), ('headSha', ASCENDING)], unique=True)
+                self._indexes_created = True
+
+    def schedule_fetch(self, repo_full_name: str, pr_number: int, head_sha: Optional[str] = None) -> Tuple[Optional[PRDiff], Optional[str]]:
+        """
+        Make sure the diff of a PR's head commit is stored, fetching it in the
+        background if it is not.
+
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            pr_number: The pull request number
+            head_sha: The PR's head commit SHA (default: looked up on GitHub)
+
+        Returns:
+            Tuple of (PRDiff for the head commit, error_message). A diff that
+            is already stored or being fetched is returned as is; a failed
+            one, or one pending for longer than PR_DIFF_PENDING_TIMEOUT, is
+            fetched again.
+        """
+        try:
+            self._ensure_indexes()
+
+            if head_sha is None:
+                success, response = self.git_service.get_pull_request(repo_full_name, pr_number)
+                if not success:
+                    return None, response.get('error', 'Failed to get pull request')
+                head_sha = response['head']['sha']
+
+            query = {'repoFullName': repo_full_name, 'prNumber': pr_number, 'headSha': head_sha}
+            stale_before = (datetime.now() - timedelta(seconds=self.pending_timeout)).isoformat()
+            existing = self.collection.find_one(query)
+            if existing and not self._needs_fetch(existing, stale_before):
+                return PRDiff.from_dict(existing), None
+
+            # Claim the fetch only if the record is still missing, failed or
+            # stale, so concurrent requests enqueue it once. When another
+            # request got there first, the filter no longer matches and the
+            # upsert runs into the unique index.
+            pr_diff = PRDiff(repo_full_name, pr_number, head_sha=head_sha)
+            fields = pr_diff.to_dict()
+            created_at = fields.pop('createdAt')
+            try:
+                self.collection.find_one_and_update(
+                    {**query, '$or': [
+                        {'status': PRDiff.FAILED},
+                        {'status': PRDiff.PENDING, 'updatedAt': {'$lt': stale_before}}
+                    ]},
+                    {'$set': fields, '$setOnInsert': {'createdAt': created_at}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                return PRDiff.from_dict(self.collection.find_one(query)), None
+
+            self.executor.submit(self._fetch, repo_full_name, pr_number, head_sha)
+            return pr_diff, None
+        except Exception as e:
+            return None, str(e)
+
+    @staticmethod
+    def _needs_fetch(data: Dict[str, Any], stale_before: str) -> bool:
+        if data.get('status') == PRDiff.FAILED:
+            return True
+        return data.get('status') == PRDiff.PENDING and (data.get('updatedAt') or '') < stale_before
+
+    def _fetch(self, repo_full_name: str, pr_number: int, head_sha: str):
+        query = {'repoFullName': repo_full_name, 'prNumber': pr_number, 'headSha': head_sha}
+        try:
+            # The PR's diff endpoint serves whatever the head is now, which may
+            # already be a later push; compare against the base pins the diff
+            # to head_sha
+            success, pull_request = self.git_service.get_pull_request(repo_full_name, pr_number)
+            if not success:
+                raise RuntimeError(pull_request.get('error'))
+            success, response = self.git_service.open_commit_diff(
+                repo_full_name, pull_request['base']['ref'], head_sha, priority=BACKGROUND)
+            if not success:
+                raise RuntimeError(response.get('error'))
+
+            # Files are stored as they arrive, so only one file's diff is held in memory
+            files = []
+            with response:
+                lines = (line.decode('utf-8', 'replace') for line in iter_lines(response.iter_content(64 * 1024)))
+                for index, file in enumerate(iter_split_diff(lines)):
+                    diff_bytes = file.pop('diff').encode('utf-8')
+                    files.append({
+                        'index': index,
+                        **file,
+                        'size': len(diff_bytes),
+                        'contentHash': self.blobs.put(diff_bytes)
+                    })
+
+            self.collection.update_one(query, {'$set': {
+                'status': PRDiff.READY,
+                'files': files,
+                'fileCount': len(files),
+                'additions': sum(file['additions'] for file in files),
+                'deletions': sum(file['deletions'] for file in files),
+                'error': None,
+                'updatedAt': datetime.now().isoformat()
+            }})
+            print(f"✅ Stored diff for PR #{pr_number} in '{repo_full_name}' at {head_sha[:7]} ({len(files)} files)")
+        except Exception as e:
+            print(f"Error fetching diff for PR #{pr_number} in '{repo_full_name}': {str(e)}")
+            self.collection.update_one(query, {'$set': {
+                'status': PRDiff.FAILED,
+                'error': str(e),
+                'updatedAt': datetime.now().isoformat()
+            }})
+
+    def get_diff(self, repo_full_name: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[PRDiff]:
+        """
+        Get the stored diff summary of a pull request.
+
+        Args:
+            repo_full_name: Full repository name (username/repo)
+            pr_number: The pull request number
+            head_sha: Head commit to get the diff of (default: the most recently requested one)
+
+        Returns:
+            PRDiff object or None if the diff was never requested
+        """
+        query = {'repoFullName': repo_full_name, 'prNumber': pr_number}
+        if head_sha is not None:
+            query['headSha'] = head_sha
+
+        data = self.collection.find_one(query, sort=[('createdAt', DESCENDING)])
+        if not data:
+            return None
+        return PRDiff.from_dict(data)
+
+    def get_diff_files(self, pr_diff: PRDiff, page: int = 1, per_page: int = 20,
+                       path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of the per-file diffs of a stored PR diff.
+
+        Args:
+            pr_diff: A ready PRDiff
+            page: 1-based page number
+            per_page: Files per page
+            path: Only return the diff of this file
+
+        Returns:
+            List of per-file diffs in diff order
+        """
+        files = [file for file in pr_diff.files if path is None or file['path'] == path]
+        start = (page - 1) * per_page
+        return [
+            {**file, 'diff': self.blobs.read(file['contentHash']).decode('utf-8')}
+            for file in files[start:start + per_page]
+        ]
+
+    def iter_diff(self, pr_diff: PRDiff, path: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Stream the text of a stored PR diff without loading it into memory.
+
+        Args:
+            pr_diff: A ready PRDiff
+            path: Only stream the diff of this file
+
+        Returns:
+            Iterator over chunks of the unified diff, in diff order
+        """
+        for file in pr_diff.files:
+            if path is None or file['path'] == path:
+                yield from self.blobs.open(file['contentHash'])
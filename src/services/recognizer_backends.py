@@ -0,0 +1,220 @@
+import io
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import speech_recognition as sr
+from pydub import AudioSegment
+
+
+class RecognitionSegment:
+    def __init__(self, text: str, confidence: Optional[float], start: float, end: float):
+        self.text = text
+        self.confidence = confidence
+        self.start = start
+        self.end = end
+
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+    def to_dict(self) -> Dict:
+        """Convert the segment to a dictionary."""
+        return {
+            'text': self.text,
+            'confidence': self.confidence,
+            'start': self.start,
+            'end': self.end
+        }
+
+
+class RecognitionResult:
+    def __init__(self, segments: List[RecognitionSegment]):
+        self.segments = segments
+
+    @property
+    def text(self) -> str:
+        return ' '.join(segment.text for segment in self.segments if segment.text)
+
+    @property
+    def confidence(self) -> Optional[float]:
+        """Word-weighted mean of the segment confidences, or None if no engine reported one."""
+        scored = [s for s in self.segments if s.confidence is not None and s.word_count()]
+        total_words = sum(s.word_count() for s in scored)
+        if not total_words:
+            return None
+        return sum(s.confidence * s.word_count() for s in scored) / total_words
+
+
+class RecognizerBackend:
+    """
+    Interface for speech recognition engines.
+
+    Implementations receive decoded audio and raise sr.UnknownValueError when
+    no speech could be recognized, or sr.RequestError when the engine itself
+    is unavailable, so callers handle every engine the same way.
+    """
+
+    name = None
+
+    def recognize(self, audio: AudioSegment, language: str) -> RecognitionResult:
+        raise NotImplementedError
+
+
+class GoogleRecognizerBackend(RecognizerBackend):
+    """Google Web Speech API via speech_recognition (network call)."""
+
+    name = 'google'
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio: AudioSegment, language: str) -> RecognitionResult:
+        buffer = io.BytesIO()
+        audio.export(buffer, format="wav")
+        buffer.seek(0)
+
+        with sr.AudioFile(buffer) as source:
+            audio_data = self.recognizer.record(source)
+
+        # show_all returns the raw response, which carries the engine's
+        # confidence for the best alternative
+        response = self.recognizer.recognize_google(audio_data, language=language, show_all=True)
+        if not isinstance(response, dict) or not response.get('alternative'):
+            raise sr.UnknownValueError()
+
+        best = response['alternative'][0]
+        if 'transcript' not in best:
+            raise sr.UnknownValueError()
+
+        return RecognitionResult([
+            RecognitionSegment(
+                text=best['transcript'],
+                confidence=best.get('confidence'),
+                start=0.0,
+                end=len(audio) / 1000.0
+            )
+        ])
+
+
+_vosk_models = {}
+_vosk_models_lock = threading.Lock()
+
+
+def load_vosk_model(model_path: str):
+    """Load a Vosk model once per process and share it across requests."""
+    with _vosk_models_lock:
+        model = _vosk_models.get(model_path)
+        if model is None:
+            try:
+                import vosk
+            except ImportError:
+                raise sr.RequestError("Offline recognition requires the 'vosk' package")
+
+            if not os.path.isdir(model_path):
+                raise sr.RequestError(f"Vosk model not found at '{model_path}'")
+
+            vosk.SetLogLevel(-1)
+            model = vosk.Model(model_path)
+            _vosk_models[model_path] = model
+        return model
+
+
+class VoskRecognizerBackend(RecognizerBackend):
+    """
+    Offline recognition on local CPUs with a Vosk (Kaldi) model.
+
+    A Vosk model covers a single language. VOSK_MODEL_PATH is the model for
+    VOSK_MODEL_LANGUAGE (default en-US), and models for other languages are
+    configured as VOSK_MODEL_PATH_<LANGUAGE>, e.g. VOSK_MODEL_PATH_FR_FR, or
+    VOSK_MODEL_PATH_FR for every French variant. Other languages are rejected
+    rather than transcribed with the wrong model.
+    """
+
+    name = 'vosk'
+    sample_rate = 16000
+    chunk_size = 8000  # bytes of PCM fed to the recognizer per call
+
+    def __init__(self, model_path: Optional[str] = None, model_language: Optional[str] = None):
+        self.model_path = model_path or os.getenv('VOSK_MODEL_PATH', 'models/vosk')
+        self.model_language = model_language or os.getenv('VOSK_MODEL_LANGUAGE', 'en-US')
+
+    def model_path_for(self, language: str) -> str:
+        """
+        Find the model for a language code, most specific setting first.
+
+        Raises:
+            sr.RequestError: If no model is configured for the language
+        """
+        code = language.strip().upper().replace('-', '_')
+        for suffix in (code, code.split('_')[0]):
+            path = os.getenv(f'VOSK_MODEL_PATH_{suffix}')
+            if path:
+                return path
+
+        if code.split('_')[0] == self.model_language.strip().upper().replace('-', '_').split('_')[0]:
+            return self.model_path
+        raise sr.RequestError(f"No Vosk model for language '{language}'; set VOSK_MODEL_PATH_{code} to the model's path")
+
+    def recognize(self, audio: AudioSegment, language: str) -> RecognitionResult:
+        import vosk
+
+        model = load_vosk_model(self.model_path_for(language))
+        recognizer = vosk.KaldiRecognizer(model, self.sample_rate)
+        recognizer.SetWords(True)
+
+        pcm = audio.set_channels(1).set_frame_rate(self.sample_rate).set_sample_width(2).raw_data
+        segments = []
+        for offset in range(0, len(pcm), self.chunk_size):
+            if recognizer.AcceptWaveform(pcm[offset:offset + self.chunk_size]):
+                segments.append(self._parse_segment(recognizer.Result()))
+        segments.append(self._parse_segment(recognizer.FinalResult()))
+
+        segments = [segment for segment in segments if segment is not None]
+        if not segments:
+            raise sr.UnknownValueError()
+        return RecognitionResult(segments)
+
+    def _parse_segment(self, raw_result: str) -> Optional[RecognitionSegment]:
+        result = json.loads(raw_result)
+        words = result.get('result') or []
+        text = result.get('text', '').strip()
+        if not text or not words:
+            return None
+
+        return RecognitionSegment(
+            text=text,
+            confidence=sum(word['conf'] for word in words) / len(words),
+            start=words[0]['start'],
+            end=words[-1]['end']
+        )
+
+
+RECOGNIZER_BACKENDS = {
+    GoogleRecognizerBackend.name: GoogleRecognizerBackend,
+    VoskRecognizerBackend.name: VoskRecognizerBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_recognizer_backend(name: Optional[str] = None) -> RecognizerBackend:
+    """
+    Get the shared recognizer backend instance.
+
+    Args:
+        name: Backend name (default: SPEECH_RECOGNIZER_BACKEND or 'google')
+
+    Returns:
+        The process-wide instance of the requested backend
+    """
+    name = (name or os.getenv('SPEECH_RECOGNIZER_BACKEND', 'google')).strip().lower()
+    if name not in RECOGNIZER_BACKENDS:
+        raise ValueError(f"Unknown speech recognizer backend '{name}'. "
+                         f"Available backends: {', '.join(RECOGNIZER_BACKENDS)}")
+
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = RECOGNIZER_BACKENDS[name]()
+        return _backends[name]
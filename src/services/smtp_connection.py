@@ -0,0 +1,123 @@
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+
+from utils import metrics
+
+
+class SMTPConnection:
+    """
+    One long-lived, authenticated SMTP session.
+
+    The connection, STARTTLS and login happen once and every message is
+    sent over the same session. If the server has dropped the connection
+    (e.g. after an idle timeout), it is re-established and the send is tried
+    once more.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, use_ssl: bool = False, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+
+        self._server = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.last_used = None
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        print(f"Connecting to SMTP server {self.host}:{self.port} using {'SSL' if self.use_ssl else 'standard'} connection...")
+        with metrics.span('smtp', 'connect'):
+            server = smtp_class(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.use_tls and not self.use_ssl:
+                    server.starttls()
+                if self.username and self.password:
+                    server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+
+        self._server = server
+        self.connects += 1
+        self.last_used = time.monotonic()
+
+    def send(self, message: Message, from_addr: str, to_addrs: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send a message over the shared session.
+
+        Args:
+            message: The message to send
+            from_addr: Envelope sender
+            to_addrs: Envelope recipients
+
+        Returns:
+            The recipients the server refused, mapped to its (code, response)
+
+        Raises:
+            smtplib.SMTPException or OSError if the message could not be sent
+        """
+        with self._lock:
+            for attempt in range(2):
+                if self._server is None:
+                    self._connect()
+                try:
+                    with metrics.span('smtp', 'send'):
+                        refused = self._server.send_message(message, from_addr, to_addrs)
+                    self.last_used = time.monotonic()
+                    return refused
+                except smtplib.SMTPRecipientsRefused:
+                    # Every RCPT got an answer and smtplib has reset the
+                    # transaction, so the session is still usable
+                    raise
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # Dropped while idle; reconnect and try once more
+                    self._close()
+                    if attempt:
+                        raise
+                except (smtplib.SMTPException, OSError):
+                    # Failed mid-transaction (e.g. a timeout during DATA); the
+                    # session may be in any state, so don't reuse it
+                    self._close()
+                    raise
+
+    def noop(self) -> bool:
+        """Keep an idle session alive; returns False (and drops the session) if it is gone."""
+        with self._lock:
+            if self._server is None:
+                return False
+            try:
+                with metrics.span('smtp', 'noop'):
+                    code, _ = self._server.noop()
+                if code == 250:
+                    self.last_used = time.monotonic()
+                    return True
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close()
+            return False
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
@@ -1,18 +1,51 @@
 import os
 import time
+import hashlib
+import queue
+import subprocess
+import threading
+import numpy as np
 import speech_recognition as sr
+from concurrent.futures import ThreadPoolExecutor
 from pydub import AudioSegment
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from models.transcription import Transcription
+from services.recognizer_backends import RecognizerBackend, RecognitionResult, RecognitionSegment, get_recognizer_backend
+from utils import metrics
+from utils.ttl_cache import TTLCache
+from utils.upload_limits import MAX_AUDIO_UPLOAD_SIZE
 from werkzeug.utils import secure_filename
-import tempfile
-import io
+
+# Silence or noise is an answer from the recognizer, not a failure of it
+NO_SPEECH_OUTCOME = {sr.UnknownValueError: 'no_speech'}
+
+
+class AudioDecodeError(Exception):
+    """Raised when an uploaded recording cannot be decoded or breaks an upload limit."""
+
 
 class TranscriptionService:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.allowed_formats = {'wav'}
-        self.max_file_size = 10 * 1024 * 1024  # 10MB limit
+    def __init__(self, backend_name: Optional[str] = None):
+        # Speech recognition engine, shared across requests (see SPEECH_RECOGNIZER_BACKEND)
+        self.backend = get_recognizer_backend(backend_name)
+        self.allowed_formats = {'wav', 'webm', 'ogg', 'opus', 'mp3'}
+        self.max_file_size = MAX_AUDIO_UPLOAD_SIZE
+        self.max_duration_ms = int(os.getenv('TRANSCRIPTION_MAX_DURATION_MS', '600000'))
+        self.decode_sample_rate = 16000
+        self.decode_chunk_size = 64 * 1024
+
+        # Cache of finished transcriptions keyed by audio fingerprint, so client
+        # retries that re-upload the same recording skip recognition
+        self.cache = TTLCache(
+            max_size=int(os.getenv('TRANSCRIPTION_CACHE_SIZE', '256')),
+            ttl=float(os.getenv('TRANSCRIPTION_CACHE_TTL', '600'))
+        )
+
+        # Voice activity detection settings for streaming transcription
+        self.stream_speech_threshold_db = float(os.getenv('TRANSCRIPTION_STREAM_SPEECH_THRESHOLD_DB', '-40'))
+        self.stream_min_silence_ms = int(os.getenv('TRANSCRIPTION_STREAM_MIN_SILENCE_MS', '600'))
+        self.stream_max_segment_ms = int(os.getenv('TRANSCRIPTION_STREAM_MAX_SEGMENT_MS', '15000'))
+        self.stream_max_duration_ms = int(os.getenv('TRANSCRIPTION_STREAM_MAX_DURATION_MS', '600000'))
 
     def is_valid_file(self, file) -> Tuple[bool, Optional[str]]:
         """Validate the uploaded file."""
@@ -24,26 +57,199 @@ class TranscriptionService:
             return False, "No selected file"
 
         # Check file extension
-        extension = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+        extension = self.get_extension(file.filename)
         if extension not in self.allowed_formats:
-            return False, f"File format not allowed. Allowed formats: {', '.join(self.allowed_formats)}"
+            return False, f"File format not allowed. Allowed formats: {', '.join(sorted(self.allowed_formats))}"
 
-        # Check file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset file pointer
+        # File size and contents are checked while the upload streams in
+        # (see validate_upload_header), and again while decoding
+        return True, None
 
-        if file_size > self.max_file_size:
-            return False, f"File too large. Maximum size: {self.max_file_size / (1024 * 1024)}MB"
+    def validate_upload_header(self, filename: Optional[str], header: bytes) -> Optional[str]:
+        """
+        Check the first bytes of an upload before the rest of it is received.
 
-        return True, None
+        The container magic must match the file extension, and for WAV the
+        duration declared in the header must be within the limit.
+
+        Args:
+            filename: The uploaded file name
+            header: The first bytes of the file
+
+        Returns:
+            An error message if the upload should be rejected, None otherwise
+        """
+        extension = self.get_extension(filename or '')
+        if extension not in self.allowed_formats:
+            return f"File format not allowed. Allowed formats: {', '.join(sorted(self.allowed_formats))}"
+
+        if extension == 'wav':
+            if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return "File is not a valid WAV file"
+            duration_ms = self._declared_wav_duration_ms(header)
+            if duration_ms is not None and duration_ms > self.max_duration_ms:
+                return f"Audio too long. Maximum duration: {self.max_duration_ms / 1000}s"
+        elif extension in ('ogg', 'opus'):
+            if header[:4] != b'OggS':
+                return f"File is not a valid {extension.upper()} file"
+        elif extension == 'webm':
+            if header[:4] != b'\x1a\x45\xdf\xa3':
+                return "File is not a valid WEBM file"
+        elif extension == 'mp3':
+            is_frame_sync = len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0
+            if header[:3] != b'ID3' and not is_frame_sync:
+                return "File is not a valid MP3 file"
+
+        return None
+
+    def _declared_wav_duration_ms(self, header: bytes) -> Optional[float]:
+        """Duration declared by a RIFF/WAVE header, or None if it cannot be read from these bytes."""
+        byte_rate = None
+        offset = 12
+        while offset + 8 <= len(header):
+            chunk_id = header[offset:offset + 4]
+            chunk_size = int.from_bytes(header[offset + 4:offset + 8], 'little')
+            if chunk_id == b'fmt ' and offset + 20 <= len(header):
+                byte_rate = int.from_bytes(header[offset + 16:offset + 20], 'little')
+            elif chunk_id == b'data':
+                # Streaming writers leave the size as 0 or 0xFFFFFFFF when unknown
+                if not byte_rate or chunk_size in (0, 0xFFFFFFFF):
+                    return None
+                return chunk_size * 1000 / byte_rate
+            offset += 8 + chunk_size + (chunk_size % 2)
+        return None
+
+    def fingerprint_audio(self, audio: AudioSegment, language: str) -> str:
+        """
+        Fingerprint decoded audio for the transcription cache.
+
+        The samples are normalized to 16kHz mono 16-bit PCM first, so the same
+        recording hashes identically regardless of container details. The
+        recognizer backend is part of the key since engines disagree.
+
+        Args:
+            audio: The decoded audio segment
+            language: The language code the audio will be transcribed in
+
+        Returns:
+            Hex digest identifying the audio and language
+        """
+        normalized = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+        digest = hashlib.sha256()
+        digest.update(self.backend.name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(language.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(normalized.raw_data)
+        return digest.hexdigest()
 
-    def transcribe_audio(self, audio_file, language: str = "en-US") -> Tuple[Transcription, Optional[str]]:
+    def get_extension(self, filename: str) -> str:
+        return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+    def decode_audio(self, audio_file) -> Tuple[Optional[AudioSegment], Optional[str]]:
+        """
+        Decode an uploaded audio file.
+
+        WAV is parsed in memory. Compressed formats are piped through ffmpeg
+        while the upload is read, so neither side touches the disk, and
+        decoding stops as soon as the maximum duration is exceeded.
+
+        Args:
+            audio_file: The uploaded audio file object
+
+        Returns:
+            A tuple containing the decoded AudioSegment and an error message (if any)
+        """
+        extension = self.get_extension(audio_file.filename)
+        try:
+            if extension == 'wav':
+                audio = AudioSegment.from_file(audio_file.stream, format='wav')
+            else:
+                with metrics.span('ffmpeg', 'decode'):
+                    audio = self._decode_compressed(audio_file.stream)
+        except AudioDecodeError as e:
+            return None, str(e)
+        except Exception as e:
+            return None, f"Could not decode audio: {str(e)}"
+
+        if len(audio) > self.max_duration_ms:
+            return None, f"Audio too long. Maximum duration: {self.max_duration_ms / 1000}s"
+        return audio, None
+
+    def _decode_compressed(self, stream) -> AudioSegment:
+        """Decode a compressed stream to 16kHz mono PCM through an ffmpeg pipe."""
+        command = [
+            AudioSegment.converter, '-hide_banner', '-loglevel', 'error',
+            '-i', 'pipe:0',
+            '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(self.decode_sample_rate),
+            'pipe:1'
+        ]
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        errors = []
+        state = {'too_large': False}
+
+        def feed_input():
+            # Copy the upload into ffmpeg chunk by chunk, enforcing the size cap
+            # on the compressed bytes
+            written = 0
+            try:
+                while True:
+                    chunk = stream.read(self.decode_chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > self.max_file_size:
+                        state['too_large'] = True
+                        break
+                    process.stdin.write(chunk)
+            except (BrokenPipeError, ValueError):
+                pass  # ffmpeg exited early, e.g. duration limit reached
+            finally:
+                try:
+                    process.stdin.close()
+                except (BrokenPipeError, ValueError):
+                    pass
+
+        def drain_errors():
+            errors.append(process.stderr.read())
+
+        feeder = threading.Thread(target=feed_input, daemon=True)
+        error_reader = threading.Thread(target=drain_errors, daemon=True)
+        feeder.start()
+        error_reader.start()
+
+        max_pcm_bytes = self.max_duration_ms * self.decode_sample_rate // 1000 * 2
+        pcm = bytearray()
+        try:
+            while True:
+                chunk = process.stdout.read(self.decode_chunk_size)
+                if not chunk:
+                    break
+                pcm.extend(chunk)
+                if len(pcm) > max_pcm_bytes:
+                    raise AudioDecodeError(f"Audio too long. Maximum duration: {self.max_duration_ms / 1000}s")
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            feeder.join()
+            error_reader.join()
+
+        if state['too_large']:
+            raise AudioDecodeError(f"File too large. Maximum size: {self.max_file_size / (1024 * 1024)}MB")
+        if process.returncode != 0 or not pcm:
+            message = errors[0].decode('utf-8', errors='replace').strip() if errors and errors[0] else ''
+            raise AudioDecodeError(f"Could not decode audio: {message or 'no audio stream found'}")
+
+        return AudioSegment(data=bytes(pcm), sample_width=2, frame_rate=self.decode_sample_rate, channels=1)
+
+    def transcribe_audio(self, audio: AudioSegment, language: str = "en-US") -> Tuple[Transcription, Optional[str]]:
         """
-        Transcribe the audio file to text.
+        Transcribe decoded audio to text.
 
         Args:
-            audio_file: The audio file object
+            audio: The decoded audio (see decode_audio)
             language: The language code (default: en-US)
 
         Returns:
@@ -52,49 +258,40 @@ class TranscriptionService:
         start_time = time.time()
 
         try:
-            # Save the file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                audio_file.save(temp_file.name)
-
-                # Convert the audio to the format needed by the recognizer
-                audio = AudioSegment.from_wav(temp_file.name)
-
-                # Convert to in-memory WAV file (no need for FLAC conversion)
-                buffer = io.BytesIO()
-                audio.export(buffer, format="wav")
-                buffer.seek(0)
-
-                # Use speech_recognition to transcribe
-                with sr.AudioFile(buffer) as source:
-                    audio_data = self.recognizer.record(source)
-
-                    # Use the simpler recognize_google method without show_all
-                    # This avoids the need for FLAC conversion
-                    transcription_text = self.recognizer.recognize_google(
-                        audio_data,
-                        language=language
-                    )
-
-                    # Calculate processing time
-                    processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-
-                    # Since we're not using show_all, we don't get confidence
-                    # Set a default confidence value
-                    confidence = 0.8
-
-                    # Count words
-                    word_count = len(transcription_text.split())
-
-                    # Create and return the transcription object
-                    transcription = Transcription(
-                        transcription=transcription_text,
-                        confidence=confidence,
-                        processing_time=processing_time,
-                        word_count=word_count,
-                        language=language
-                    )
-
-                    return transcription, None
+            # Serve repeat uploads of the same recording from the cache
+            fingerprint = self.fingerprint_audio(audio, language)
+            cached = self.cache.get(fingerprint)
+            if cached is not None:
+                return Transcription(
+                    transcription=cached.transcription,
+                    confidence=cached.confidence,
+                    processing_time=cached.processing_time,
+                    word_count=cached.word_count,
+                    language=cached.language,
+                    timestamp=cached.timestamp,
+                    segments=cached.segments,
+                    cache_hit=True
+                ), None
+
+            # Run the configured recognizer backend
+            with metrics.span('speech_recognition', self.backend.name, NO_SPEECH_OUTCOME):
+                result = self.backend.recognize(audio, language)
+
+            # Calculate processing time
+            processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+
+            # Create and return the transcription object
+            transcription = Transcription(
+                transcription=result.text,
+                confidence=result.confidence,
+                processing_time=processing_time,
+                word_count=len(result.text.split()),
+                language=language,
+                segments=[segment.to_dict() for segment in result.segments]
+            )
+            self.cache.set(fingerprint, transcription)
+
+            return transcription, None
 
         except sr.UnknownValueError:
             return None, "Speech Recognition could not understand audio"
@@ -102,10 +299,202 @@ class TranscriptionService:
             return None, f"Could not request results from Speech Recognition service; {str(e)}"
         except Exception as e:
             return None, f"Error transcribing audio: {str(e)}"
-        finally:
-            # Clean up the temporary file
-            if 'temp_file' in locals():
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
+
+    def open_stream(self, language: str = "en-US", sample_rate: int = 16000) -> 'StreamingTranscriptionSession':
+        """
+        Start an incremental transcription of audio that is still being recorded.
+
+        Args:
+            language: The language code (default: en-US)
+            sample_rate: Sample rate of the 16-bit mono PCM the client will send
+
+        Returns:
+            A StreamingTranscriptionSession to feed audio chunks into
+        """
+        return StreamingTranscriptionSession(
+            backend=self.backend,
+            language=language,
+            sample_rate=sample_rate,
+            speech_threshold_db=self.stream_speech_threshold_db,
+            min_silence_ms=self.stream_min_silence_ms,
+            max_segment_ms=self.stream_max_segment_ms,
+            max_duration_ms=self.stream_max_duration_ms
+        )
+
+
+class StreamingTranscriptionSession:
+    """
+    Incremental transcription of a live recording.
+
+    Audio arrives as 16-bit little-endian mono PCM chunks. An energy based voice
+    activity detector splits it into utterances at pauses, and each completed
+    utterance is recognized in the background while recording continues.
+    Partial results are published on the events queue in recording order.
+    """
+
+    frame_ms = 30
+
+    def __init__(self,
+                 backend: RecognizerBackend,
+                 language: str,
+                 sample_rate: int,
+                 speech_threshold_db: float,
+                 min_silence_ms: int,
+                 max_segment_ms: int,
+                 max_duration_ms: int):
+        self.backend = backend
+        self.language = language
+        self.sample_rate = sample_rate
+        self.speech_threshold_db = speech_threshold_db
+        self.min_silence_frames = max(1, min_silence_ms // self.frame_ms)
+        self.max_segment_frames = max(1, max_segment_ms // self.frame_ms)
+        self.max_duration_ms = max_duration_ms
+
+        self.frame_bytes = sample_rate * self.frame_ms // 1000 * 2
+        self.pending = bytearray()    # bytes not yet forming a whole frame
+        self.current = bytearray()    # PCM of the utterance being recorded
+        self.current_start_frame = 0
+        self.frames_seen = 0
+        self.silent_frames = 0
+        self.in_speech = False
+
+        self.segments: List[RecognitionSegment] = []
+        self.errors: List[str] = []   # recognizer failures, in recording order
+        self.events = queue.Queue()
+        # A single worker keeps recognition results in recording order
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.futures = []
+
+    @property
+    def duration_ms(self) -> int:
+        return self.frames_seen * self.frame_ms
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """
+        Add a chunk of recorded audio.
+
+        Returns:
+            An error message if the stream exceeded its maximum duration, None otherwise
+        """
+        self.pending.extend(chunk)
+        while len(self.pending) >= self.frame_bytes:
+            frame = bytes(self.pending[:self.frame_bytes])
+            del self.pending[:self.frame_bytes]
+            self._process_frame(frame)
+
+        if self.duration_ms > self.max_duration_ms:
+            return f"Recording too long. Maximum duration: {self.max_duration_ms / 1000}s"
+        return None
+
+    def finish(self) -> Tuple[Optional[Transcription], Optional[str]]:
+        """
+        Flush the last utterance and wait for all outstanding recognition.
+
+        Returns:
+            A tuple containing the Transcription object and an error message
+            (if any); a failed recognizer call fails the whole transcription
+            rather than leaving a gap in it
+        """
+        start_time = time.time()
+        if self.pending:
+            self.current.extend(self.pending)
+            self.pending.clear()
+        if self.in_speech:
+            self._submit_current()
+
+        for future in self.futures:
+            future.result()
+        self.close()
+
+        if self.errors:
+            return None, self.errors[0]
+        if not self.segments:
+            return None, "Speech Recognition could not understand audio"
+
+        result = RecognitionResult(self.segments)
+        transcription = Transcription(
+            transcription=result.text,
+            confidence=result.confidence,
+            processing_time=(time.time() - start_time) * 1000,  # Time from end of recording to final result
+            word_count=len(result.text.split()),
+            language=self.language,
+            segments=[segment.to_dict() for segment in self.segments]
+        )
+        return transcription, None
+
+    def close(self):
+        """Release the background worker without waiting for pending work."""
+        self.executor.shutdown(wait=False)
+
+    def drain_events(self) -> List[Dict]:
+        """Return every event published since the last call."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _process_frame(self, frame: bytes):
+        samples = np.frombuffer(frame, dtype='<i2').astype(np.float64)
+        rms = np.sqrt(np.mean(samples ** 2)) if samples.size else 0.0
+        level_db = 20 * np.log10(rms / 32768.0) if rms > 0 else -np.inf
+        is_speech = level_db >= self.speech_threshold_db
+
+        if is_speech and not self.in_speech:
+            self.in_speech = True
+            self.current_start_frame = self.frames_seen
+            self.current.clear()
+        self.frames_seen += 1
+
+        if not self.in_speech:
+            return
+
+        self.current.extend(frame)
+        self.silent_frames = 0 if is_speech else self.silent_frames + 1
+        segment_frames = len(self.current) // self.frame_bytes
+        if self.silent_frames >= self.min_silence_frames or segment_frames >= self.max_segment_frames:
+            self._submit_current()
+
+    def _submit_current(self):
+        pcm = bytes(self.current)
+        offset = self.current_start_frame * self.frame_ms / 1000.0
+        self.current.clear()
+        self.in_speech = False
+        self.silent_frames = 0
+        self.futures.append(self.executor.submit(self._recognize, pcm, offset))
+
+    def _recognize(self, pcm: bytes, offset: float):
+        audio = AudioSegment(data=pcm, sample_width=2, frame_rate=self.sample_rate, channels=1)
+        try:
+            with metrics.span('speech_recognition', self.backend.name, NO_SPEECH_OUTCOME):
+                result = self.backend.recognize(audio, self.language)
+        except sr.UnknownValueError:
+            return  # Noise rather than speech
+        except sr.RequestError as e:
+            self._fail(f"Could not request results from Speech Recognition service; {str(e)}")
+            return
+        except Exception as e:
+            self._fail(f"Error transcribing audio: {str(e)}")
+            return
+
+        for segment in result.segments:
+            segment.start += offset
+            segment.end += offset
+            self.segments.append(segment)
+            self.events.put({
+                'type': 'partial',
+                'segment': segment.to_dict(),
+                'transcription': RecognitionResult(self.segments).text
+            })
+
+    def _fail(self, message: str):
+        self.errors.append(message)
+        self.events.put({
+            'type': 'error',
+            'error': {
+                'code': 'TRANSCRIPTION_FAILED',
+                'message': message,
+                'details': None
+            }
+        })
@@ -0,0 +1,28 @@
+import hmac
+import os
+from functools import wraps
+
+from flask import request
+from utils.fast_json import jsonify
+
+
+def require_admin_token(view):
+    """
+    Restrict a route to operators: the request must carry
+    `Authorization: Bearer <ADMIN_API_TOKEN>`.
+
+    Returns 401 for a missing or wrong token, and 503 when ADMIN_API_TOKEN is
+    not set, so the route is closed until a token is configured.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.getenv('ADMIN_API_TOKEN')
+        if not token:
+            return jsonify({'error': 'Admin token is not configured'}), 503
+
+        scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Request, Response, request
+from utils.ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content types worth compressing; everything else (images, audio, archives)
+# is either already compressed or binary
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class Compression:
+    """
+    Compresses responses with brotli or gzip, whichever the client's
+    Accept-Encoding prefers (brotli only if the brotli package is installed).
+
+    Responses are left alone when they are smaller than min_size, are not a
+    text-like content type, already have a Content-Encoding, or are not a
+    plain successful response. Streamed responses are compressed chunk by
+    chunk, with each chunk flushed so the client still receives data as it
+    is produced.
+
+    Compressed bodies of GET responses are cached by the hash of the
+    uncompressed body, so an unchanged response (e.g. the problem catalog) is
+    only compressed once. Responses marked Cache-Control: no-store or private
+    are not cached.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.min_size = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+        self.gzip_level = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+        self.brotli_quality = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+        self.cache_max_bytes = int(os.getenv('COMPRESSION_CACHE_MAX_BYTES', str(2 * 1024 * 1024)))
+        self.cache = TTLCache(
+            max_size=int(os.getenv('COMPRESSION_CACHE_SIZE', '128')),
+            ttl=float(os.getenv('COMPRESSION_CACHE_TTL', '600'))
+        )
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        self.stats = {'compressed': 0, 'streamed': 0, 'cacheHits': 0, 'bytesIn': 0, 'bytesOut': 0}
+        self._stats_lock = threading.Lock()  # after_request runs on every request thread
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        app.after_request(self.after_request)
+        app.extensions['compression'] = self
+
+    def negotiate(self, req: Request) -> Optional[str]:
+        """The encoding to use for req, or None to send the response uncompressed."""
+        return req.accept_encodings.best_match(self.encodings)
+
+    def after_request(self, response: Response) -> Response:
+        if not self._is_compressible(response):
+            return response
+
+        # The body depends on Accept-Encoding whether or not this client gets it compressed
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate(request)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            self._count(streamed=1)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self._compress_cached(data, encoding, self._is_cacheable(response)))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # A strong ETag promises identical bytes, which no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+        return compressor.compress(data) + compressor.flush()
+
+    def _is_compressible(self, response: Response) -> bool:
+        if request.method == 'HEAD' or not 200 <= response.status_code < 300 or response.status_code in (204, 206):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        return (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _is_cacheable(response: Response) -> bool:
+        return request.method == 'GET' and not (response.cache_control.no_store or response.cache_control.private)
+
+    def _compress_cached(self, data: bytes, encoding: str, cacheable: bool) -> bytes:
+        key = None
+        if cacheable and len(data) <= self.cache_max_bytes:
+            key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                self._count(cacheHits=1, bytesIn=len(data), bytesOut=len(compressed))
+                return compressed
+
+        compressed = self.compress(data, encoding)
+        self._count(compressed=1, bytesIn=len(data), bytesOut=len(compressed))
+        if key is not None:
+            self.cache.set(key, compressed)
+        return compressed
+
+    def _count(self, **increments: int):
+        with self._stats_lock:
+            for counter, amount in increments.items():
+                self.stats[counter] += amount
+
+    def _compress_stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            compress = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if not chunk:
+                    continue
+                data = compress(chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
@@ -0,0 +1,105 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+from typing import Any
+
+from bson import ObjectId
+from flask import current_app
+from flask.json import JSONEncoder as FlaskJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+def default(obj: Any) -> Any:
+    """Convert values that JSON has no type for: ObjectIds and decimals become strings, sets become lists."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONEncoder(FlaskJSONEncoder):
+    """
+    Standard library encoder with the same output as dumps(): datetimes as
+    ISO 8601 and ObjectIds as strings. Installed as app.json_encoder so code
+    that still goes through flask.json agrees with jsonify().
+    """
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, (datetime, date, time)):
+            return obj.isoformat()
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        if dataclasses.is_dataclass(obj):
+            return dataclasses.asdict(obj)
+        try:
+            return default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize obj to JSON bytes with orjson, which handles datetime, date,
+    UUID and dataclasses natively. Falls back to the standard library for
+    what orjson rejects (e.g. integers beyond 64 bits) or when orjson is not
+    installed.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+
+    return json.dumps(
+        obj,
+        cls=JSONEncoder,
+        indent=2 if indent else None,
+        separators=(', ', ': ') if indent else (',', ':'),
+        sort_keys=sort_keys,
+        ensure_ascii=False
+    ).encode('utf-8')
+
+
+def jsonify(*args, **kwargs):
+    """
+    Drop-in replacement for flask.jsonify that encodes with dumps().
+
+    Honors the same settings: JSONIFY_PRETTYPRINT_REGULAR (or debug mode)
+    indents the output, JSON_SORT_KEYS sorts keys and JSONIFY_MIMETYPE sets
+    the content type.
+    """
+    if args and kwargs:
+        raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+    elif len(args) == 1:  # single args are passed directly to dumps()
+        data = args[0]
+    else:
+        data = args or kwargs
+
+    config = current_app.config
+    body = dumps(
+        data,
+        indent=config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug,
+        sort_keys=config["JSON_SORT_KEYS"]
+    )
+    return current_app.response_class(body + b"\n", mimetype=config["JSONIFY_MIMETYPE"])
+
+
+def init_app(app):
+    """Make flask.json (used by e.g. request parsing helpers and extensions) serialize like jsonify()."""
+    app.json_encoder = JSONEncoder
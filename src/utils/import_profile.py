@@ -0,0 +1,85 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+class ImportRecord:
+    def __init__(self, module: str, self_us: int, cumulative_us: int, depth: int):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    @property
+    def package(self) -> str:
+        return self.module.split('.')[0]
+
+
+def measure_imports(module: str = 'app', cwd: Optional[str] = None) -> List[ImportRecord]:
+    """
+    Import module in a fresh interpreter with -X importtime and parse the timings.
+
+    Args:
+        module: Module to import
+        cwd: Directory to run the interpreter in (default: this file's src directory)
+
+    Returns:
+        One record per imported module, in import order
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    if result.returncode != 0 and not records:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return records
+
+
+def import_report(module: str = 'app', top: int = 25) -> str:
+    """Per-module import time report for module, like `python -X importtime` but summarized."""
+    records = measure_imports(module)
+
+    # Children are listed before their parent, so the module's own imports are
+    # the nested records right before its top-level record
+    end = next((i for i in range(len(records) - 1, -1, -1)
+                if records[i].module == module and records[i].depth == 0), None)
+    if end is None:
+        raise RuntimeError(f"{module} was not imported")
+    start = end
+    while start > 0 and records[start - 1].depth > 0:
+        start -= 1
+    records = records[start:end + 1]
+    total = records[-1].cumulative_us
+
+    # Time spent in each top-level package, including all of its submodules
+    by_package: Dict[str, int] = defaultdict(int)
+    for record in records:
+        by_package[record.package] += record.self_us
+
+    # What the module imports directly, with everything those imports pull in
+    direct = [record for record in records if record.depth == 1]
+
+    lines = [f"Importing {module} took {total / 1000:.1f} ms ({len(records)} modules)", ""]
+    lines.append(f"Direct imports of {module} by cumulative time:")
+    lines.append(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for record in sorted(direct, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        lines.append(f"{record.cumulative_us / 1000:>14.1f}{record.self_us / 1000:>10.1f}  {record.module}")
+
+    lines += ["", "Packages by total time (the package and all its submodules):"]
+    lines.append(f"{'ms':>14}{'share':>10}  package")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"{self_us / 1000:>14.1f}{self_us / max(total, 1):>10.0%}  {package}")
+
+    return '\n'.join(lines)
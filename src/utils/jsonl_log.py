@@ -0,0 +1,214 @@
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+class JSONLinesLog:
+    """
+    Append-only log of JSON records, one per line.
+
+    Appends are buffered in memory and flushed every flush_interval seconds,
+    once buffer_size records are pending, and at exit. A flush is a single
+    write to a file opened with O_APPEND while holding an exclusive flock, so
+    several processes can share one log without interleaving or losing lines.
+
+    The active file is rotated when it would grow past max_bytes or when the
+    day changes: it is renamed to {name}.{YYYY-MM-DD}.{n}{ext}, and only the
+    newest backup_count rotated files are kept (0 keeps all of them).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 30,
+                 buffer_size: int = 100, flush_interval: float = 1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        atexit.register(self.flush)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Queue a record for the next flush."""
+        line = json.dumps(record, default=str, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.buffer_size
+        if full or self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._start_flusher()
+
+    def flush(self) -> None:
+        """Write every buffered record to the log."""
+        with self._flush_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+
+            data = ''.join(lines).encode('utf-8')
+            fd = self._open_locked()
+            try:
+                if self._should_rotate(fd, len(data)):
+                    self._rotate()
+                    os.close(fd)
+                    fd = self._open_locked()
+                os.write(fd, data)
+            finally:
+                os.close(fd)  # also releases the flock
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, since: Optional[str] = None,
+              until: Optional[str] = None, time_field: str = 'time_invoked',
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find records in the log and its rotated files, newest first.
+
+        Args:
+            filters: Field values the records must have
+            since: Only records whose time_field is at or after this ISO timestamp
+            until: Only records whose time_field is before this ISO timestamp
+            time_field: Field holding the record's ISO timestamp
+            limit: Maximum number of records
+
+        Returns:
+            Matching records, newest first
+        """
+        self.flush()
+        filters = filters or {}
+        results = []
+        for path in reversed(self._files()):
+            for record in self._read_reversed(path):
+                timestamp = record.get(time_field) or ''
+                if since and timestamp < since:
+                    continue
+                if until and timestamp >= until:
+                    continue
+                if any(record.get(key) != value for key, value in filters.items()):
+                    continue
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_periodically, name='jsonl-log-flush', daemon=True)
+                    self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing {self.path}: {str(e)}")
+
+    def _open_locked(self) -> int:
+        """Open the active file for appending and lock it, reopening if another process rotated it meanwhile."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _should_rotate(self, fd: int, incoming: int) -> bool:
+        stat = os.fstat(fd)
+        if stat.st_size == 0:
+            return False
+        if self.max_bytes and stat.st_size + incoming > self.max_bytes:
+            return True
+        return date.fromtimestamp(stat.st_mtime) != date.today()
+
+    def _rotate(self):
+        # Rotated files are named after the day their records were written
+        day = date.fromtimestamp(os.stat(self.path).st_mtime).isoformat()
+        base, ext = os.path.splitext(self.path)
+        index = max([key[1] for key, _ in self._rotated_keys() if key[0] == day], default=0) + 1
+        os.rename(self.path, f"{base}.{day}.{index}{ext}")
+
+        if self.backup_count:
+            for old_path in self._rotated_files()[:-self.backup_count]:
+                os.remove(old_path)
+
+    def _rotated_keys(self) -> List[Tuple[Tuple[str, int], str]]:
+        """((day, index), path) of every rotated file, oldest first."""
+        base, ext = os.path.splitext(self.path)
+        pattern = re.compile(re.escape(base) + r'\.(\d{4}-\d{2}-\d{2})\.(\d+)' + re.escape(ext) + '$')
+        rotated = []
+        for path in glob.glob(f"{glob.escape(base)}.*{ext}"):
+            match = pattern.match(path)
+            if match:
+                rotated.append(((match.group(1), int(match.group(2))), path))
+        return sorted(rotated)
+
+    def _rotated_files(self) -> List[str]:
+        """Rotated files, oldest first."""
+        return [path for _, path in self._rotated_keys()]
+
+    def _files(self) -> List[str]:
+        """Rotated files oldest first, then the active file."""
+        return self._rotated_files() + ([self.path] if os.path.exists(self.path) else [])
+
+    @staticmethod
+    def _read_reversed(path: str, block_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+        """
+        Records of one file, last first. The file is read backwards a block
+        at a time, so a query that stops early only reads the end of it.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            position = f.seek(0, os.SEEK_END)
+            # Pieces of the line that continues past the current block, last piece first
+            partial = []
+            while position > 0:
+                size = min(block_size, position)
+                position -= size
+                f.seek(position)
+                lines = f.read(size).split(b'\n')
+                partial.append(lines[-1])
+                if len(lines) == 1:
+                    continue
+                yield from JSONLinesLog._parse_lines([b''.join(reversed(partial))])
+                yield from JSONLinesLog._parse_lines(reversed(lines[1:-1]))
+                partial = [lines[0]]
+            yield from JSONLinesLog._parse_lines([b''.join(reversed(partial))])
+
+    @staticmethod
+    def _parse_lines(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
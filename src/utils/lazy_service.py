@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Optional
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when a lazily built service cannot be constructed, e.g. because its configuration is missing."""
+
+    def __init__(self, name: str, cause: Exception):
+        super().__init__(f"{name} is unavailable: {cause}")
+        self.name = name
+        self.cause = cause
+
+
+class LazyService:
+    """
+    Stand-in for a service that is only constructed when it is first used.
+
+    Controllers create their services at import; wrapping the constructor in
+    a LazyService keeps that module-level name but defers the work (clients,
+    thread pools, configuration checks) until a request needs it, so starting
+    a worker is cheap and a service with missing configuration only fails the
+    routes that use it. A failed construction raises ServiceUnavailableError
+    and is tried again on the next use.
+
+    Args:
+        factory: Builds the service
+        name: Name used in errors (default: the factory's name)
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None):
+        self._factory = factory
+        self._name = name or getattr(factory, '__name__', 'service')
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Return the service, constructing it on first call."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    try:
+                        self._instance = self._factory()
+                    except Exception as e:
+                        print(f"Could not initialize {self._name}: {str(e)}")
+                        raise ServiceUnavailableError(self._name, e) from e
+                instance = self._instance
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = 'initialized' if self.initialized else 'not initialized'
+        return f"<LazyService {self._name} ({state})>"
@@ -0,0 +1,121 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Type
+
+from flask import Flask, Response, g, request
+from pymongo import monitoring
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+except ImportError:  # Metrics are disabled
+    Histogram = None
+
+# Seconds; the long tail covers transcription, LLM and bulk GitHub requests
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+if Histogram is not None:
+    REQUEST_DURATION = Histogram(
+        'pangea_http_request_duration_seconds',
+        'Time to handle an HTTP request, until the handler returned its response',
+        ['method', 'route', 'route_class', 'status'],
+        buckets=BUCKETS
+    )
+    DEPENDENCY_DURATION = Histogram(
+        'pangea_dependency_call_duration_seconds',
+        'Time spent in a call to an external dependency (MongoDB, GitHub, SMTP, OpenAI, speech recognition, ffmpeg)',
+        ['dependency', 'operation', 'outcome'],
+        buckets=BUCKETS
+    )
+
+
+def observe(dependency: str, operation: str, seconds: float, outcome: str = 'ok'):
+    """Record one call to an external dependency."""
+    if Histogram is not None:
+        DEPENDENCY_DURATION.labels(dependency, operation, outcome).observe(seconds)
+
+
+@contextmanager
+def span(dependency: str, operation: str,
+         outcomes: Optional[Dict[Type[BaseException], str]] = None) -> Iterator[None]:
+    """
+    Time the enclosed call to an external dependency. The outcome label is
+    'ok' if the block completes and 'error' if it raises, unless the
+    exception's type is mapped to another outcome in outcomes (for answers
+    that arrive as exceptions, e.g. "no speech found").
+
+    Example:
+        with metrics.span('openai', 'chat_completion'):
+            response = openai.ChatCompletion.create(...)
+    """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except BaseException as e:
+        outcome = next((label for exc_type, label in (outcomes or {}).items() if isinstance(e, exc_type)), 'error')
+        raise
+    finally:
+        observe(dependency, operation, time.perf_counter() - start, outcome)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records every MongoDB command (find, insert, update, aggregate, ...) each service sends."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        observe('mongodb', event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        observe('mongodb', event.command_name, event.duration_micros / 1e6, 'error')
+
+
+_mongo_listener = None
+
+
+def init_app(app: Flask):
+    """
+    Time every request and serve the metrics at GET /metrics.
+
+    Register this before other after_request hooks (e.g. compression) so the
+    time they take is included. MongoDB commands are only recorded for clients
+    created after this is called.
+
+    With several worker processes (gunicorn), set PROMETHEUS_MULTIPROC_DIR
+    so /metrics aggregates all of them; see gunicorn.conf.py.
+    """
+    global _mongo_listener
+    if Histogram is None:
+        print("prometheus_client is not installed; metrics are disabled")
+    elif _mongo_listener is None:
+        _mongo_listener = MongoCommandListener()
+        monitoring.register(_mongo_listener)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('request_start', None)
+        if Histogram is not None and start is not None and request.path != '/metrics':
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            route_class = request.environ.get('pangea.route_class', 'fast')
+            REQUEST_DURATION.labels(request.method, route, route_class, str(response.status_code)) \
+                .observe(time.perf_counter() - start)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint, methods=['GET'])
+
+
+def metrics_endpoint():
+    if Histogram is None:
+        return Response('prometheus_client is not installed\n', status=503, mimetype='text/plain')
+
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
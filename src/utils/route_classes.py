@@ -0,0 +1,69 @@
+import os
+import time
+from typing import Callable, Iterable
+
+# Routes that wait on audio recognition or an LLM, or fan out to many GitHub calls
+LONG_ROUTE_PREFIXES = (
+    '/api/v1/transcribe',
+    '/api/v1/feedback',
+    '/api/git/create-pr',
+    '/api/git/create-branches',
+    '/api/git/pr-diff/stream',
+    '/api/git/pr-diff/raw',
+)
+
+# WebSocket routes, which stay open for the whole session
+STREAM_ROUTE_PREFIXES = (
+    '/api/v1/transcribe/stream',
+)
+
+FAST = 'fast'
+LONG = 'long'
+STREAM = 'stream'
+
+FAST_REQUEST_TIMEOUT = float(os.getenv('FAST_REQUEST_TIMEOUT', '30'))
+LONG_REQUEST_TIMEOUT = float(os.getenv('LONG_REQUEST_TIMEOUT', '300'))
+
+
+def route_class(path: str) -> str:
+    """Classify a request path as 'fast' (CRUD), 'long' or 'stream'."""
+    if path.startswith(STREAM_ROUTE_PREFIXES):
+        return STREAM
+    if path.startswith(LONG_ROUTE_PREFIXES):
+        return LONG
+    return FAST
+
+
+def request_timeout(path: str) -> float:
+    """Time budget for a request to path in seconds, or 0 for no budget."""
+    return {FAST: FAST_REQUEST_TIMEOUT, LONG: LONG_REQUEST_TIMEOUT, STREAM: 0}[route_class(path)]
+
+
+class SlowRequestLogger:
+    """
+    WSGI middleware that records each request's route class in the environ
+    ('pangea.route_class') and logs requests that run past their class's
+    time budget. The time measured is until the handler returns its
+    response, not until a streamed body has been sent.
+
+    A slow request is not interrupted: WSGI servers cannot safely stop a
+    handler thread, so budgets are enforced by the timeouts on the calls the
+    handlers make (GitHub, OpenAI, SMTP) and this only reports overruns.
+    """
+
+    def __init__(self, app: Callable, log: Callable[[str], None] = print):
+        self.app = app
+        self.log = log
+
+    def __call__(self, environ, start_response) -> Iterable[bytes]:
+        path = environ.get('PATH_INFO', '')
+        environ['pangea.route_class'] = route_class(path)
+        budget = request_timeout(path)
+        start = time.monotonic()
+        try:
+            return self.app(environ, start_response)
+        finally:
+            elapsed = time.monotonic() - start
+            if budget and elapsed > budget:
+                self.log(f"Slow {environ['pangea.route_class']} request: {environ.get('REQUEST_METHOD')} {path} "
+                         f"took {elapsed:.1f}s (budget {budget:.0f}s)")
@@ -0,0 +1,193 @@
+import base64
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from email import message_from_bytes
+from email.policy import default as default_policy
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class SMTPSink:
+    """
+    In-process SMTP server that accepts every message and keeps it in memory
+    instead of delivering it, for local development and benchmarks.
+
+    It speaks enough SMTP for smtplib: EHLO/HELO, AUTH PLAIN/LOGIN (any
+    credentials are accepted), MAIL, RCPT, DATA, RSET, NOOP and QUIT. There is
+    no STARTTLS, so clients must connect without TLS.
+
+    Args:
+        host: Address to listen on
+        port: Port to listen on (0 picks a free port)
+        latency: Seconds added before the greeting and before each DATA reply,
+            to mimic a remote server
+        max_messages: Captured messages kept, oldest dropped first
+        reject: Recipients refused with 550 at RCPT
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 max_messages: int = 1000, reject: Iterable[str] = ()):
+        self.latency = latency
+        self.reject = {address.lower() for address in reject}
+        self.messages = deque(maxlen=max_messages)
+        self.lock = threading.Lock()
+        self.stats = {'connections': 0, 'messages': 0, 'recipients': 0, 'rejected': 0}
+
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self) -> 'SMTPSink':
+        self.thread = threading.Thread(target=self.server.serve_forever, name='smtp-sink', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_messages(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Captured messages, newest first, without their raw data."""
+        with self.lock:
+            messages = list(self.messages)[::-1][:limit]
+        return [{key: value for key, value in message.items() if key != 'data'} for message in messages]
+
+    def clear(self):
+        with self.lock:
+            self.messages.clear()
+            self.stats = {'connections': 0, 'messages': 0, 'recipients': 0, 'rejected': 0}
+
+    def _capture(self, mail_from: str, rcpt_tos: List[str], data: bytes):
+        message = message_from_bytes(data, policy=default_policy)
+        with self.lock:
+            self.messages.append({
+                'mailFrom': mail_from,
+                'rcptTos': rcpt_tos,
+                'subject': message.get('Subject'),
+                'size': len(data),
+                'receivedAt': datetime.now().isoformat(),
+                'data': data
+            })
+            self.stats['messages'] += 1
+            self.stats['recipients'] += len(rcpt_tos)
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            timeout = 300
+
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+            def read_line(self) -> Optional[str]:
+                line = self.rfile.readline(65536)
+                return line.decode('utf-8', 'replace').rstrip('\r\n') if line else None
+
+            def handle(self):
+                with sink.lock:
+                    sink.stats['connections'] += 1
+                if sink.latency:
+                    time.sleep(sink.latency)
+                self.reply('220 localhost SMTP sink ready')
+
+                mail_from, rcpt_tos = None, []
+                while True:
+                    line = self.read_line()
+                    if line is None:
+                        return
+                    verb, _, argument = line.partition(' ')
+                    verb = verb.upper()
+
+                    if verb == 'EHLO':
+                        self.reply('250-localhost')
+                        self.reply('250-8BITMIME')
+                        self.reply('250 AUTH PLAIN LOGIN')
+                    elif verb == 'HELO':
+                        self.reply('250 localhost')
+                    elif verb == 'AUTH':
+                        self.authenticate(argument)
+                    elif verb == 'MAIL':
+                        mail_from, rcpt_tos = self.address_of(argument), []
+                        self.reply('250 OK')
+                    elif verb == 'RCPT':
+                        if mail_from is None:
+                            self.reply('503 Need MAIL command')
+                            continue
+                        recipient = self.address_of(argument)
+                        if recipient.lower() in sink.reject:
+                            with sink.lock:
+                                sink.stats['rejected'] += 1
+                            self.reply('550 No such user')
+                        else:
+                            rcpt_tos.append(recipient)
+                            self.reply('250 OK')
+                    elif verb == 'DATA':
+                        if not rcpt_tos:
+                            self.reply('503 Need RCPT command')
+                            continue
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        data = self.read_data()
+                        if data is None:
+                            return
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        sink._capture(mail_from, rcpt_tos, data)
+                        mail_from, rcpt_tos = None, []
+                        self.reply('250 OK: message captured')
+                    elif verb == 'RSET':
+                        mail_from, rcpt_tos = None, []
+                        self.reply('250 OK')
+                    elif verb == 'NOOP':
+                        self.reply('250 OK')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('502 Command not implemented')
+
+            def authenticate(self, argument: str):
+                mechanism, _, initial = argument.partition(' ')
+                mechanism = mechanism.upper()
+                if mechanism == 'PLAIN':
+                    if not initial:
+                        self.reply('334 ')
+                        self.read_line()
+                elif mechanism == 'LOGIN':
+                    if not initial:
+                        self.reply('334 ' + base64.b64encode(b'Username:').decode('ascii'))
+                        self.read_line()
+                    self.reply('334 ' + base64.b64encode(b'Password:').decode('ascii'))
+                    self.read_line()
+                else:
+                    self.reply('504 Unrecognized authentication type')
+                    return
+                self.reply('235 Authentication successful')
+
+            def read_data(self) -> Optional[bytes]:
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return None
+                    if line in (b'.\r\n', b'.\n'):
+                        return b''.join(lines)
+                    # Undo dot-stuffing
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+
+            @staticmethod
+            def address_of(argument: str) -> str:
+                # "FROM:<a@b.c> SIZE=123" -> "a@b.c"
+                _, _, value = argument.partition(':')
+                value = value.strip()
+                if value.startswith('<'):
+                    value = value[1:value.find('>')]
+                return value.split(' ')[0]
+
+        return Handler
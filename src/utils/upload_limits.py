@@ -0,0 +1,140 @@
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import Request, request
+from werkzeug.formparser import default_stream_factory
+from utils.fast_json import jsonify
+
+# Limit on the uploaded (compressed) bytes of an audio recording
+MAX_AUDIO_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Validator called with (filename, first bytes of the upload); returns an error message or None
+UploadValidator = Callable[[Optional[str], bytes], Optional[str]]
+
+
+class UploadRejected(Exception):
+    """Raised while a multipart upload is being parsed to stop reading it."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadPolicy:
+    def __init__(self, max_bytes: int, validator: Optional[UploadValidator] = None, sniff_bytes: int = 4096):
+        self.max_bytes = max_bytes
+        self.validator = validator
+        self.sniff_bytes = sniff_bytes
+
+
+class ValidatingUploadStream:
+    """
+    Container for an uploaded file that checks it while it is being received.
+
+    The first bytes are handed to the policy's validator as soon as they
+    arrive, and the byte count is checked on every write, so a bogus or
+    oversized upload is rejected before it is buffered to memory or disk.
+    """
+
+    def __init__(self, target, policy: UploadPolicy, filename: Optional[str]):
+        self._target = target
+        self._policy = policy
+        self._filename = filename
+        self._header = bytearray()
+        self._validated = policy.validator is None
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        self.bytes_written += len(data)
+        if self.bytes_written > self._policy.max_bytes:
+            raise UploadRejected(
+                f"File too large. Maximum size: {self._policy.max_bytes / (1024 * 1024)}MB", 413)
+
+        if not self._validated:
+            self._header.extend(data[:self._policy.sniff_bytes - len(self._header)])
+            if len(self._header) >= self._policy.sniff_bytes:
+                self._validate()
+
+        return self._target.write(data)
+
+    def seek(self, *args):
+        # The parser seeks back to the start once the part is complete; short
+        # files are validated at that point
+        if not self._validated:
+            self._validate()
+        return self._target.seek(*args)
+
+    def _validate(self):
+        self._validated = True
+        error = self._policy.validator(self._filename, bytes(self._header))
+        if error:
+            raise UploadRejected(error)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __iter__(self):
+        return iter(self._target)
+
+
+class UploadRequest(Request):
+    """Request class that applies the active route's UploadPolicy to multipart file parts."""
+
+    upload_policy: Optional[UploadPolicy] = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        target = default_stream_factory(
+            total_content_length=total_content_length,
+            filename=filename,
+            content_type=content_type,
+            content_length=content_length,
+        )
+        if self.upload_policy is None:
+            return target
+        return ValidatingUploadStream(target, self.upload_policy, filename)
+
+
+def limit_upload(max_bytes: int, validator: Optional[UploadValidator] = None, max_file_bytes: Optional[int] = None):
+    """
+    Per-route request body limit for upload endpoints.
+
+    Rejects requests whose declared Content-Length exceeds max_bytes (or that
+    do not declare one) before any of the body is read. With UploadRequest
+    installed as the app's request class, file parts are also validated as
+    they stream in.
+
+    Args:
+        max_bytes: Maximum request body size in bytes
+        validator: Optional check of each file's first bytes
+        max_file_bytes: Maximum size of each file part (default: max_bytes)
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.content_length is None:
+                return jsonify({
+                    'success': False,
+                    'error': {
+                        'code': 'LENGTH_REQUIRED',
+                        'message': 'Content-Length header is required for uploads',
+                        'details': None
+                    }
+                }), 411
+
+            if request.content_length > max_bytes:
+                return jsonify({
+                    'success': False,
+                    'error': {
+                        'code': 'PAYLOAD_TOO_LARGE',
+                        'message': f"Request too large. Maximum size: {max_bytes / (1024 * 1024)}MB",
+                        'details': None
+                    }
+                }), 413
+
+            request.upload_policy = UploadPolicy(max_file_bytes or max_bytes, validator)
+            return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,132 @@
+"""
+Benchmark the contact endpoint against the built-in local SMTP sink.
+
+The contact blueprint runs in-process with SMTP_SINK enabled, so emails go to
+an in-process SMTP server instead of a real mail provider. The benchmark
+sends a fixed number of contact submissions from a fixed number of
+concurrent clients and reports:
+
+- endpoint throughput and latency percentiles
+- how long the background queue took to deliver every email
+- how many SMTP connections (and so TLS handshakes and logins on a real
+  server) and SMTP transactions were needed per submission
+
+Usage:
+    python tests/benchmark_contact_api.py --requests 200 --concurrency 16 --founders 3 --smtp-latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_benchmark(args):
+    import controllers.contact_controller as contact_controller
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.register_blueprint(contact_controller.contact_blueprint, url_prefix='/api')
+    email_service = contact_controller.email_service
+    sink = email_service.sink
+
+    latencies = []
+    statuses = {}
+
+    def call(index):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/contact', json={
+            'name': f'Benchmark {index}',
+            'email': f'sender{index}@example.com',
+            'subject': f'Benchmark message {index}',
+            'message': 'Hello from the contact benchmark'
+        })
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # The email service logs every send to stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        # Wait for the background queue to deliver everything
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline:
+            stats = email_service.get_queue_stats()
+            if stats['queued'] == 0 and stats['pendingRetries'] == 0 \
+                    and stats['sent'] + stats['failed'] >= stats['enqueued']:
+                break
+            time.sleep(0.01)
+        drained = time.perf_counter() - start
+
+    queue_stats = email_service.get_queue_stats()
+    return {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'founders': args.founders,
+        'statuses': statuses,
+        'throughput': round(args.requests / elapsed, 1),
+        'p50Ms': round(percentile(latencies, 0.50), 2),
+        'p95Ms': round(percentile(latencies, 0.95), 2),
+        'p99Ms': round(percentile(latencies, 0.99), 2),
+        'deliveredInSeconds': round(drained, 2),
+        'emailsSent': queue_stats['sent'],
+        'emailsFailed': queue_stats['failed'],
+        'retries': queue_stats['retried'],
+        'smtpConnections': sink.stats['connections'],
+        'smtpConnectionsPerRequest': round(sink.stats['connections'] / args.requests, 3),
+        'smtpTransactions': sink.stats['messages'],
+        'smtpTransactionsPerRequest': round(sink.stats['messages'] / args.requests, 2),
+        'recipientsDelivered': sink.stats['recipients']
+    }
+
+def print_results(result):
+    print("-" * 60)
+    for key, value in result.items():
+        print(f"{key:<30}{value}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the contact endpoint against a local SMTP sink')
+    parser.add_argument('--requests', type=int, default=200, help='Contact submissions to send')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--founders', type=int, default=3, help='Addresses in FOUNDERS_EMAIL')
+    parser.add_argument('--smtp-latency', type=float, default=0.02,
+                        help='Sink latency before the greeting and each DATA reply (seconds)')
+    parser.add_argument('--drain-timeout', type=float, default=120.0,
+                        help='Seconds to wait for the queue to deliver every email')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    # Must be set before the contact controller is imported
+    log_dir = tempfile.mkdtemp(prefix='contact-benchmark-')
+    os.environ.update({
+        'SMTP_SINK': 'True',
+        'SMTP_SINK_LATENCY': str(args.smtp_latency),
+        'FOUNDERS_EMAIL': ','.join(f'founder{i}@example.com' for i in range(args.founders)),
+        'EMAIL_QUEUE_MAX_SIZE': str(max(1000, args.requests * 2)),
+        'EMAIL_SESSION_LOG': os.path.join(log_dir, 'email_sessions.jsonl')
+    })
+
+    if not args.json:
+        print(f"Benchmarking POST /api/contact against the local SMTP sink "
+              f"({args.smtp_latency * 1000:.0f}ms latency, {args.concurrency} concurrent clients, "
+              f"{args.founders} founders)")
+
+    result = run_benchmark(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_results(result)
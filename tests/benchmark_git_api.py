@@ -0,0 +1,174 @@
+"""
+Benchmark the git endpoints against the local fake GitHub API.
+
+The git blueprint runs in-process with GitHub replaced by tests/fake_github.py,
+so results do not depend on the network or on real GitHub quota. Each
+scenario reports throughput, latency percentiles and how many GitHub calls
+and TCP connections the endpoint needed, once per client configuration:
+
+- default:  pooled keep-alive session, read caches enabled
+- no-cache: read caches disabled (every lookup goes to GitHub)
+- no-pool:  one pooled connection, so concurrent calls open new connections
+
+Usage:
+    python tests/benchmark_git_api.py --requests 200 --concurrency 16 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fake_github import FakeGitHub
+
+CONFIGURATIONS = {
+    'default': {},
+    'no-cache': {'GITHUB_CACHE_TTL': '0', 'GITHUB_ETAG_CACHE_SIZE': '0'},
+    'no-pool': {'GITHUB_POOL_CONNECTIONS': '1', 'GITHUB_POOL_MAXSIZE': '1'},
+}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_scenario(name, app, fake_github, make_request, count, concurrency):
+    """Send count requests from concurrency threads and summarize them"""
+    fake_github.reset_stats()
+    latencies = []
+    statuses = {}
+
+    def call(index):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = make_request(client, index)
+        response.get_data()
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # The services log every GitHub call to stdout
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(count)))
+    elapsed = time.perf_counter() - start
+
+    stats = fake_github.stats
+    return {
+        'scenario': name,
+        'requests': count,
+        'statuses': statuses,
+        'throughput': round(count / elapsed, 1),
+        'p50Ms': round(percentile(latencies, 0.50), 1),
+        'p95Ms': round(percentile(latencies, 0.95), 1),
+        'githubCalls': stats['requests'],
+        'githubCallsPerRequest': round(stats['requests'] / count, 2),
+        'notModified': stats['notModified'],
+        'connections': stats['connections']
+    }
+
+def run_benchmark(configuration, args, fake_github):
+    """Benchmark every scenario with a fresh GitService built for the configuration"""
+    import controllers.git_controller as git_controller
+    from flask import Flask
+    from services.git_service import GitService
+
+    overrides = CONFIGURATIONS[configuration]
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        git_controller.git_service = GitService()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    app = Flask(__name__)
+    app.register_blueprint(git_controller.git_blueprint, url_prefix='/api')
+
+    run_id = uuid.uuid4().hex[:6]
+    repo_url = f"https://github.com/bench/repo-{configuration}-{run_id}"
+    users = [f"user{i}-{run_id}" for i in range(args.requests)]
+
+    results = [
+        run_scenario('create-branch (new)', app, fake_github, lambda client, i: client.post(
+            '/api/git/create-branch', json={'repoUrl': repo_url, 'username': users[i]}),
+            args.requests, args.concurrency),
+        run_scenario('create-branch (existing)', app, fake_github, lambda client, i: client.post(
+            '/api/git/create-branch', json={'repoUrl': repo_url, 'username': users[i]}),
+            args.requests, args.concurrency),
+        run_scenario(f'create-branches (bulk of {args.bulk_size})', app, fake_github, lambda client, i: client.post(
+            '/api/git/create-branches',
+            json={'repoUrl': repo_url, 'usernames': [f"bulk{i}-{j}-{run_id}" for j in range(args.bulk_size)]}),
+            max(1, args.requests // args.bulk_size), max(1, args.concurrency // 4)),
+    ]
+
+    # A PR to stream the diff of
+    fake_github.repo(repo_url.split('github.com/')[1]).pulls[1] = {
+        'number': 1, 'head': {'ref': users[0], 'sha': 'bench'}, 'base': {'ref': 'main', 'sha': 'bench'}
+    }
+    results.append(run_scenario('pr-diff/stream', app, fake_github, lambda client, i: client.get(
+        '/api/git/pr-diff/stream', query_string={'repoUrl': repo_url, 'prNumber': 1}),
+        args.requests, args.concurrency))
+
+    return results
+
+def print_results(configuration, results):
+    print(f"\n{configuration}")
+    print("-" * 110)
+    print(f"{'scenario':<34}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'gh calls':>10}{'per req':>9}{'304s':>7}{'conns':>7}  statuses")
+    for result in results:
+        print(f"{result['scenario']:<34}{result['throughput']:>9}{result['p50Ms']:>9}{result['p95Ms']:>9}"
+              f"{result['githubCalls']:>10}{result['githubCallsPerRequest']:>9}{result['notModified']:>7}"
+              f"{result['connections']:>7}  {result['statuses']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the git endpoints against a fake GitHub API')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--bulk-size', type=int, default=20, help='Users per bulk create-branches request')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake GitHub latency per call (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra fake GitHub latency (seconds)')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='Fake GitHub requests per hour')
+    parser.add_argument('--diff-files', type=int, default=50, help='Files in the streamed PR diff')
+    parser.add_argument('--diff-lines', type=int, default=200, help='Changed lines per file in the streamed PR diff')
+    parser.add_argument('--configurations', nargs='+', default=list(CONFIGURATIONS),
+                        choices=list(CONFIGURATIONS), help='Client configurations to compare')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        diff_files=args.diff_files,
+        diff_lines=args.diff_lines
+    ).start()
+
+    # Must be set before the git controller is imported
+    os.environ['GITHUB_API_URL'] = fake_github.url
+    os.environ.setdefault('GITHUB_TOKEN', 'benchmark-token')
+    # The git controller also builds the Mongo-backed services; none of the
+    # scenarios touch MongoDB, and the client connects lazily
+    os.environ.setdefault('MONGODB_DB', 'pangea')
+
+    print(f"Benchmarking git endpoints against fake GitHub at {fake_github.url} "
+          f"({args.latency * 1000:.0f}ms latency, {args.concurrency} concurrent clients)")
+
+    all_results = {}
+    for configuration in args.configurations:
+        all_results[configuration] = run_benchmark(configuration, args, fake_github)
+        if not args.json:
+            print_results(configuration, all_results[configuration])
+
+    if args.json:
+        print(json.dumps(all_results, indent=2))
+
+    fake_github.stop()
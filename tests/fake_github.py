@@ -0,0 +1,310 @@
+"""
+Local fake of the GitHub REST API endpoints GitService uses, for running
+the git tests offline and for benchmarks.
+
+Implements:
+- GET  /repos/{owner}/{repo}/git/ref/heads/{branch}
+- GET  /repos/{owner}/{repo}/branches/{branch}
+- POST /repos/{owner}/{repo}/git/refs
+- POST /repos/{owner}/{repo}/pulls
+- GET  /repos/{owner}/{repo}/pulls/{number} (JSON, or the diff with
+  Accept: application/vnd.github.v3.diff)
+- GET  /repos/{owner}/{repo}/compare/{base}...{head} (the diff only, for a
+  head commit of one of the fake's pulls)
+
+Repositories are created on first use with the configured branches. Every
+response carries X-RateLimit-* headers and an ETag; conditional GETs get
+304 Not Modified, which (as on GitHub) does not use up quota.
+
+Run standalone and point the API at it:
+    python tests/fake_github.py --port 8765 --latency 0.05
+    GITHUB_API_URL=http://127.0.0.1:8765 python src/app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeRepository:
+    def __init__(self, branches):
+        initial_sha = hashlib.sha1(b'initial commit').hexdigest()
+        self.refs = {branch: initial_sha for branch in branches}
+        self.pulls = {}
+        self.next_pr_number = 1
+
+
+class FakeGitHub:
+    """
+    In-process fake GitHub API server.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        latency: Seconds added to every response
+        jitter: Up to this many extra seconds added at random
+        rate_limit: Requests per window reported in X-RateLimit-* headers;
+            requests beyond it get 403 until the window resets
+        rate_limit_window: Length of the rate limit window in seconds
+        branches: Branches every repository starts with
+        diff_files: Files in each generated PR diff
+        diff_lines: Changed lines per file in each generated PR diff
+    """
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, rate_limit=5000, rate_limit_window=3600,
+                 branches=('main',), diff_files=3, diff_lines=20):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.branches = tuple(branches)
+        self.diff_files = diff_files
+        self.diff_lines = diff_lines
+
+        self.repos = {}
+        self.lock = threading.RLock()
+        self.reset_at = time.time() + rate_limit_window
+        self.used = 0
+        self.stats = {'requests': 0, 'connections': 0, 'notModified': 0, 'rateLimited': 0, 'byRoute': {}}
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'connections': 0, 'notModified': 0, 'rateLimited': 0, 'byRoute': {}}
+
+    def repo(self, full_name):
+        with self.lock:
+            if full_name not in self.repos:
+                self.repos[full_name] = FakeRepository(self.branches)
+            return self.repos[full_name]
+
+    def quota_exhausted(self):
+        with self.lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self.reset_at = now + self.rate_limit_window
+                self.used = 0
+            if self.used >= self.rate_limit:
+                self.stats['rateLimited'] += 1
+                return True
+            return False
+
+    def charge(self, status):
+        """Count a response against the rate limit (304s are free) and return the X-RateLimit-* headers."""
+        with self.lock:
+            if status not in (304, 403):
+                self.used += 1
+            return {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(max(0, self.rate_limit - self.used)),
+                'X-RateLimit-Reset': str(int(self.reset_at)),
+                'X-RateLimit-Used': str(self.used)
+            }
+
+    def generate_diff(self, pull):
+        lines = []
+        for file_index in range(self.diff_files):
+            path = f"src/module_{pull['number']}_{file_index}.py"
+            lines += [
+                f"diff --git a/{path} b/{path}\n",
+                "index 83db48f..bf269f4 100644\n",
+                f"--- a/{path}\n",
+                f"+++ b/{path}\n",
+                f"@@ -1,{self.diff_lines} +1,{self.diff_lines} @@\n",
+            ]
+            for line in range(self.diff_lines):
+                lines.append(f"-value_{line} = {line}\n")
+                lines.append(f"+value_{line} = {line * 2}  # updated on {pull['head']['ref']}\n")
+        return ''.join(lines).encode('utf-8')
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            routes = [
+                ('GET', re.compile(r'^/repos/([^/]+/[^/]+)/git/ref/heads/(.+)$'), 'get_ref'),
+                ('GET', re.compile(r'^/repos/([^/]+/[^/]+)/branches/(.+)$'), 'get_branch'),
+                ('POST', re.compile(r'^/repos/([^/]+/[^/]+)/git/refs$'), 'create_ref'),
+                ('POST', re.compile(r'^/repos/([^/]+/[^/]+)/pulls$'), 'create_pull'),
+                ('GET', re.compile(r'^/repos/([^/]+/[^/]+)/pulls/(\d+)$'), 'get_pull'),
+                ('GET', re.compile(r'^/repos/([^/]+/[^/]+)/compare/(.+)\.\.\.(.+)$'), 'compare'),
+            ]
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.stats['connections'] += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.dispatch('GET')
+
+            def do_POST(self):
+                self.dispatch('POST')
+
+            def dispatch(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                delay = fake.latency + (random.uniform(0, fake.jitter) if fake.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+
+                path = self.path.split('?', 1)[0]
+                for route_method, pattern, name in self.routes:
+                    match = pattern.match(path)
+                    if route_method == method and match:
+                        break
+                else:
+                    return self.send_json(404, {'message': 'Not Found'})
+
+                with fake.lock:
+                    fake.stats['requests'] += 1
+                    fake.stats['byRoute'][name] = fake.stats['byRoute'].get(name, 0) + 1
+
+                if fake.quota_exhausted():
+                    return self.send_json(403, {'message': 'API rate limit exceeded'})
+
+                getattr(self, name)(*match.groups(), body=body)
+
+            # Routes
+
+            def get_ref(self, repo_name, branch, body=b''):
+                sha = fake.repo(repo_name).refs.get(branch)
+                if sha is None:
+                    return self.send_json(404, {'message': 'Not Found'})
+                self.send_json(200, {
+                    'ref': f'refs/heads/{branch}',
+                    'object': {'sha': sha, 'type': 'commit'}
+                })
+
+            def get_branch(self, repo_name, branch, body=b''):
+                sha = fake.repo(repo_name).refs.get(branch)
+                if sha is None:
+                    return self.send_json(404, {'message': 'Branch not found'})
+                self.send_json(200, {'name': branch, 'commit': {'sha': sha}})
+
+            def create_ref(self, repo_name, body=b''):
+                data = json.loads(body or b'{}')
+                ref, sha = data.get('ref', ''), data.get('sha')
+                repo = fake.repo(repo_name)
+                with fake.lock:
+                    if sha not in repo.refs.values():
+                        return self.send_json(422, {'message': 'Object does not exist'})
+                    branch = ref[len('refs/heads/'):]
+                    if branch in repo.refs:
+                        return self.send_json(422, {'message': 'Reference already exists'})
+                    repo.refs[branch] = sha
+                self.send_json(201, {'ref': ref, 'object': {'sha': sha, 'type': 'commit'}})
+
+            def create_pull(self, repo_name, body=b''):
+                data = json.loads(body or b'{}')
+                repo = fake.repo(repo_name)
+                with fake.lock:
+                    if data.get('head') not in repo.refs or data.get('base') not in repo.refs:
+                        return self.send_json(422, {'message': 'Validation Failed'})
+                    pull = {
+                        'number': repo.next_pr_number,
+                        'title': data.get('title'),
+                        'state': 'open',
+                        'head': {'ref': data['head'], 'sha': repo.refs[data['head']]},
+                        'base': {'ref': data['base'], 'sha': repo.refs[data['base']]}
+                    }
+                    repo.pulls[pull['number']] = pull
+                    repo.next_pr_number += 1
+                self.send_json(201, pull)
+
+            def get_pull(self, repo_name, number, body=b''):
+                pull = fake.repo(repo_name).pulls.get(int(number))
+                if pull is None:
+                    return self.send_json(404, {'message': 'Not Found'})
+                if 'diff' in self.headers.get('Accept', ''):
+                    return self.send_body(200, fake.generate_diff(pull), 'text/plain; charset=utf-8')
+                self.send_json(200, pull)
+
+            def compare(self, repo_name, base, head, body=b''):
+                pulls = fake.repo(repo_name).pulls.values()
+                pull = next((pull for pull in pulls if pull['head']['sha'] == head), None)
+                if pull is None or 'diff' not in self.headers.get('Accept', ''):
+                    return self.send_json(404, {'message': 'Not Found'})
+                self.send_body(200, fake.generate_diff(pull), 'text/plain; charset=utf-8')
+
+            # Responses
+
+            def send_json(self, status, data):
+                self.send_body(status, json.dumps(data).encode('utf-8'), 'application/json; charset=utf-8')
+
+            def send_body(self, status, body, content_type):
+                etag = None
+                if status == 200:
+                    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        with fake.lock:
+                            fake.stats['notModified'] += 1
+                        status, body = 304, b''
+
+                headers = fake.charge(status)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a local fake of the GitHub API')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many random extra seconds per response')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='Requests per rate limit window')
+    parser.add_argument('--rate-limit-window', type=int, default=3600, help='Rate limit window in seconds')
+    parser.add_argument('--branches', nargs='+', default=['main'], help='Branches every repository starts with')
+    parser.add_argument('--diff-files', type=int, default=3, help='Files in each generated PR diff')
+    parser.add_argument('--diff-lines', type=int, default=20, help='Changed lines per file in each generated PR diff')
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        branches=args.branches,
+        diff_files=args.diff_files,
+        diff_lines=args.diff_lines
+    )
+    print(f"Fake GitHub API listening on {fake_github.url}")
+    try:
+        fake_github.server.serve_forever()
+    except KeyboardInterrupt:
+        fake_github.stop()
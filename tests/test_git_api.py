@@ -63,11 +63,48 @@ def test_create_branch():
         print(f"Error: {str(e)}")
         return False
 
+def test_create_branches():
+    """Test the bulk create-branches endpoint"""
+    url = f"{BASE_URL}/git/create-branches"
+
+    # Use a valid GitHub repository URL
+    repo_url = "https://github.com/servicehadcode/pangea-gitFlow-test"
+
+    # Generate unique usernames so the branches are new
+    import random
+    suffix = random.randint(1000, 9999)
+    usernames = [f"testuser{suffix}-{i}" for i in range(5)]
+
+    payload = {
+        "repoUrl": repo_url,
+        "usernames": usernames,
+        "branchOff": "main"
+    }
+
+    print(f"Testing create-branches endpoint with payload:\n{json.dumps(payload, indent=2)}")
+
+    try:
+        response = requests.post(url, json=payload, timeout=60)
+
+        print(f"Status Code: {response.status_code}")
+        print(f"Response:\n{json.dumps(response.json(), indent=2)}")
+
+        data = response.json()
+        if response.status_code == 200 and data.get('failed') == 0 and len(data.get('branches', [])) == len(usernames):
+            print("\n✅ SUCCESS: Bulk branch creation API works!")
+            return True
+        else:
+            print("\n❌ FAILURE: Bulk branch creation API failed")
+            return False
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return False
+
 if __name__ == "__main__":
     print("Testing Git API - Create Branch")
     print("=" * 50)
 
-    if test_create_branch():
+    if test_create_branch() and test_create_branches():
         print("\nTest completed successfully!")
     else:
         print("\nTest failed!")
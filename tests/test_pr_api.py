@@ -1,6 +1,7 @@
 import requests
 import json
 import sys
+import time
 
 BASE_URL = "http://localhost:5000/api"
 
@@ -27,10 +28,9 @@ def test_create_pull_request():
 
         if response.status_code in [200, 201]:
             data = response.json()
-            print(f"Response:\n{json.dumps({k: v for k, v in data.items() if k != 'pr_diff'}, indent=2)}")
-            print(f"\nDiff preview (first 300 chars):\n{data.get('pr_diff', '')[:300]}...")
+            print(f"Response:\n{json.dumps(data, indent=2)}")
             print("\n✅ SUCCESS: Pull request creation API works!")
-            return True
+            return test_get_pull_request_diff(repo_url, data['pr_number'])
         else:
             print(f"Response:\n{json.dumps(response.json(), indent=2)}")
             print("\n❌ FAILURE: Pull request creation API failed")
@@ -39,6 +39,37 @@ def test_create_pull_request():
         print(f"Error: {str(e)}")
         return False
 
+def test_get_pull_request_diff(repo_url, pr_number):
+    """Test the git/pr-diff endpoint, polling until the background fetch is done"""
+    url = f"{BASE_URL}/git/pr-diff"
+    params = {"repoUrl": repo_url, "prNumber": pr_number, "perPage": 5}
+
+    print(f"\nTesting pr-diff endpoint with params:\n{json.dumps(params, indent=2)}")
+
+    try:
+        for _ in range(30):
+            response = requests.get(url, params=params, timeout=10)
+            if response.status_code != 202:
+                break
+            time.sleep(1)
+
+        print(f"Status Code: {response.status_code}")
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"Response:\n{json.dumps({k: v for k, v in data.items() if k != 'diffs'}, indent=2)}")
+            for file in data['diffs']:
+                print(f"\nDiff preview of {file['path']} (first 300 chars):\n{file['diff'][:300]}...")
+            print("\n✅ SUCCESS: Pull request diff API works!")
+            return True
+        else:
+            print(f"Response:\n{json.dumps(response.json(), indent=2)}")
+            print("\n❌ FAILURE: Pull request diff API failed")
+            return False
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return False
+
 if __name__ == "__main__":
     print("Testing PR API - Create Pull Request")
     print("=" * 50)
@@ -0,0 +1,81 @@
+import requests
+import json
+import sys
+import os
+import hmac
+import hashlib
+import uuid
+
+BASE_URL = "http://localhost:5000/api"
+
+# Must match GITHUB_WEBHOOK_SECRET of the running server
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "your-webhook-secret")
+
+def send_event(event, payload, delivery_id=None, secret=WEBHOOK_SECRET):
+    """Send a signed webhook delivery the way GitHub does"""
+    body = json.dumps(payload).encode('utf-8')
+    signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery_id or str(uuid.uuid4()),
+        "X-Hub-Signature-256": f"sha256={signature}"
+    }
+    return requests.post(f"{BASE_URL}/git/webhook", data=body, headers=headers, timeout=10)
+
+def test_webhook():
+    """Test the git/webhook endpoint"""
+    payload = {
+        "ref": "testuser-main",
+        "ref_type": "branch",
+        "repository": {"full_name": "servicehadcode/pangea-gitFlow-test"},
+        "sender": {"login": "testuser"}
+    }
+
+    print(f"Testing webhook endpoint with create event:\n{json.dumps(payload, indent=2)}")
+
+    try:
+        response = send_event("create", payload, secret="wrong-secret")
+        print(f"Bad signature status code: {response.status_code}")
+        if response.status_code != 401:
+            print("\n❌ FAILURE: Webhook accepted an invalid signature")
+            return False
+
+        delivery_id = str(uuid.uuid4())
+        response = send_event("create", payload, delivery_id)
+        print(f"Status Code: {response.status_code}")
+        print(f"Response:\n{json.dumps(response.json(), indent=2)}")
+        if response.status_code != 200:
+            print("\n❌ FAILURE: Webhook API failed")
+            return False
+
+        # GitHub redelivers with the same delivery ID
+        response = send_event("create", payload, delivery_id)
+        print(f"Redelivery response:\n{json.dumps(response.json(), indent=2)}")
+        if not response.json().get('duplicate'):
+            print("\n❌ FAILURE: Redelivered event was applied again")
+            return False
+
+        # The event log and replay are operator endpoints (ADMIN_API_TOKEN)
+        for method, path in (("get", "/git/webhook/events"), ("post", "/git/webhook/replay")):
+            response = requests.request(method, f"{BASE_URL}{path}", json={}, timeout=10)
+            print(f"{path} without admin token status code: {response.status_code}")
+            if response.status_code not in (401, 503):
+                print(f"\n❌ FAILURE: {path} accepted a request without the admin token")
+                return False
+
+        print("\n✅ SUCCESS: Webhook API works!")
+        return True
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    print("Testing Git API - Webhook")
+    print("=" * 50)
+
+    if test_webhook():
+        print("\nTest completed successfully!")
+    else:
+        print("\nTest failed!")
+        sys.exit(1)